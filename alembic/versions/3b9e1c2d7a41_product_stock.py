@@ -0,0 +1,29 @@
+"""product stock
+
+Revision ID: 3b9e1c2d7a41
+Revises: ea0f0721235c
+Create Date: 2026-10-18 10:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1c2d7a41'
+down_revision: Union[str, Sequence[str], None] = 'ea0f0721235c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los productos existentes quedan con stock NULL (sin control de inventario)
+    op.add_column('products', sa.Column('stock', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'stock')
@@ -0,0 +1,36 @@
+"""keyset order indexes
+
+Revision ID: 4d8a1f6c2e57
+Revises: b7c3e9d1f264
+Create Date: 2026-10-18 18:12:44.530291
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8a1f6c2e57'
+down_revision: Union[str, Sequence[str], None] = 'b7c3e9d1f264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los pedidos de un usuario se paginan por id: con (user_id, created_at) había que ordenarlos.
+    # Se crea antes de borrar el anterior porque MySQL exige un índice sobre user_id para la FK
+    op.create_index('ix_orders_user_id_id', 'orders', ['user_id', 'id'], unique=False)
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+
+    # Productos de una categoría sin filtro de estado, en orden de id
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_category_id_id', table_name='products')
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.drop_index('ix_orders_user_id_id', table_name='orders')
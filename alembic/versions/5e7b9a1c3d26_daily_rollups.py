@@ -0,0 +1,71 @@
+"""daily rollups
+
+Revision ID: 5e7b9a1c3d26
+Revises: d2a6f4b8c015
+Create Date: 2026-10-18 13:24:09.551870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7b9a1c3d26'
+down_revision: Union[str, Sequence[str], None] = 'd2a6f4b8c015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'CANCELED', name='order_status'), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('iva_amount', sa.Numeric(precision=16, scale=4), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('product_daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('iva_amount', sa.Numeric(precision=16, scale=4), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+
+    # Carga inicial a partir de los pedidos existentes
+    op.execute("""
+        INSERT INTO order_daily_stats (day, status, orders, subtotal, iva_amount, total_amount)
+        SELECT DATE(o.created_at), o.status, COUNT(*), SUM(i.subtotal), SUM(i.iva_amount), SUM(o.total_amount)
+        FROM orders o
+        JOIN (
+            SELECT order_id,
+                   SUM(quantity * price_at_time_of_order) AS subtotal,
+                   SUM(quantity * price_at_time_of_order * iva_at_time_of_order) AS iva_amount
+            FROM order_items
+            GROUP BY order_id
+        ) i ON i.order_id = o.id
+        GROUP BY DATE(o.created_at), o.status
+    """)
+    op.execute("""
+        INSERT INTO product_daily_sales (day, product_id, units, subtotal, iva_amount)
+        SELECT DATE(o.created_at), i.product_id, SUM(i.quantity),
+               SUM(i.quantity * i.price_at_time_of_order),
+               SUM(i.quantity * i.price_at_time_of_order * i.iva_at_time_of_order)
+        FROM order_items i
+        JOIN orders o ON o.id = i.order_id
+        WHERE o.status <> 'CANCELED'
+        GROUP BY DATE(o.created_at), i.product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_daily_sales')
+    op.drop_table('order_daily_stats')
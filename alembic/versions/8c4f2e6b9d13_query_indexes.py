@@ -0,0 +1,47 @@
+"""query indexes
+
+Revision ID: 8c4f2e6b9d13
+Revises: 3b9e1c2d7a41
+Create Date: 2026-10-18 10:42:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f2e6b9d13'
+down_revision: Union[str, Sequence[str], None] = '3b9e1c2d7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_status_id', 'orders', ['status', 'id'], unique=False)
+    op.create_index('ix_products_category_id_status_id', 'products', ['category_id', 'status', 'id'], unique=False)
+    op.create_index('ix_products_status_id', 'products', ['status', 'id'], unique=False)
+
+    # Índices redundantes: las claves primarias ya están indexadas
+    op.drop_index(op.f('ix_categories_id'), table_name='categories')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_orders_id'), table_name='orders')
+    op.drop_index(op.f('ix_products_id'), table_name='products')
+    op.drop_index(op.f('ix_order_items_id'), table_name='order_items')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_categories_id'), 'categories', ['id'], unique=False)
+
+    op.drop_index('ix_products_status_id', table_name='products')
+    op.drop_index('ix_products_category_id_status_id', table_name='products')
+    op.drop_index('ix_orders_status_id', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
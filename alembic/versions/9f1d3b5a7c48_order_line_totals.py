@@ -0,0 +1,71 @@
+"""order line totals
+
+Revision ID: 9f1d3b5a7c48
+Revises: 5e7b9a1c3d26
+Create Date: 2026-10-18 14:02:44.107392
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f1d3b5a7c48'
+down_revision: Union[str, Sequence[str], None] = '5e7b9a1c3d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Filas por UPDATE durante el relleno; cada lote se confirma por separado
+BATCH_SIZE = 10000
+
+
+def _backfill(table: str, assignments: str) -> None:
+    if context.is_offline_mode():
+        # Con --sql no hay conexión para leer MAX(id): se genera un único UPDATE de toda la tabla
+        op.execute(f"UPDATE {table} SET {assignments}")
+        return
+
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+    with op.get_context().autocommit_block():
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(
+                sa.text(f"UPDATE {table} SET {assignments} WHERE id > :start AND id <= :end"),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_items', sa.Column('subtotal', sa.Numeric(precision=12, scale=2), nullable=True))
+    op.add_column('order_items', sa.Column('iva_amount', sa.Numeric(precision=14, scale=4), nullable=True))
+    op.add_column('order_items', sa.Column('line_total', sa.Numeric(precision=14, scale=4), nullable=True))
+    op.add_column('orders', sa.Column('subtotal', sa.Numeric(precision=12, scale=2), nullable=True))
+    op.add_column('orders', sa.Column('iva_total', sa.Numeric(precision=14, scale=4), nullable=True))
+
+    _backfill('order_items', (
+        "subtotal = quantity * price_at_time_of_order, "
+        "iva_amount = quantity * price_at_time_of_order * iva_at_time_of_order, "
+        "line_total = quantity * price_at_time_of_order * (1 + iva_at_time_of_order)"
+    ))
+    _backfill('orders', (
+        "subtotal = COALESCE((SELECT SUM(i.subtotal) FROM order_items i WHERE i.order_id = orders.id), 0), "
+        "iva_total = COALESCE((SELECT SUM(i.iva_amount) FROM order_items i WHERE i.order_id = orders.id), 0)"
+    ))
+
+    op.alter_column('order_items', 'subtotal', existing_type=sa.Numeric(precision=12, scale=2), nullable=False)
+    op.alter_column('order_items', 'iva_amount', existing_type=sa.Numeric(precision=14, scale=4), nullable=False)
+    op.alter_column('order_items', 'line_total', existing_type=sa.Numeric(precision=14, scale=4), nullable=False)
+    op.alter_column('orders', 'subtotal', existing_type=sa.Numeric(precision=12, scale=2), nullable=False)
+    op.alter_column('orders', 'iva_total', existing_type=sa.Numeric(precision=14, scale=4), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'iva_total')
+    op.drop_column('orders', 'subtotal')
+    op.drop_column('order_items', 'line_total')
+    op.drop_column('order_items', 'iva_amount')
+    op.drop_column('order_items', 'subtotal')
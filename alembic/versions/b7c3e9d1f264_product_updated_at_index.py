@@ -0,0 +1,28 @@
+"""product updated_at index
+
+Revision ID: b7c3e9d1f264
+Revises: 9f1d3b5a7c48
+Create Date: 2026-10-18 16:05:12.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c3e9d1f264'
+down_revision: Union[str, Sequence[str], None] = '9f1d3b5a7c48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_updated_at', 'products', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_updated_at', table_name='products')
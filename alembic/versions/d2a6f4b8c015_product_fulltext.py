@@ -0,0 +1,31 @@
+"""product fulltext
+
+Revision ID: d2a6f4b8c015
+Revises: 8c4f2e6b9d13
+Create Date: 2026-10-18 12:06:51.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6f4b8c015'
+down_revision: Union[str, Sequence[str], None] = '8c4f2e6b9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FULLTEXT solo existe en MySQL; en otros motores la búsqueda usa el índice en memoria
+    if op.get_bind().dialect.name == 'mysql':
+        op.create_index('ix_products_name_description_ft', 'products', ['name', 'description'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'mysql':
+        op.drop_index('ix_products_name_description_ft', table_name='products')
@@ -0,0 +1 @@
+"""In-process load and latency benchmarks for service_auth and service_product."""
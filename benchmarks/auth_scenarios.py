@@ -0,0 +1,87 @@
+"""
+Scenarios for `service_auth`. Imported in a process whose sys.path starts with
+`service_auth` and whose environment already points DATABASE_URL at the seeded
+database (see benchmarks/__main__.py).
+"""
+import os
+import random
+from fnmatch import fnmatch
+
+import httpx
+
+from app.main import app
+from app.core.config import settings
+from app.db.database import engine
+from app.core.security import create_access_token
+from benchmarks.runner import measure
+from benchmarks.dataset import PASSWORD, user_email
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, params: dict, requests: int, signin_requests: int, concurrency: int):
+        self.client = client
+        self.params = params
+        self.requests = requests
+        self.signin_requests = signin_requests
+        self.concurrency = concurrency
+        self.rng = random.Random(params["seed"])
+
+    def user_id(self) -> int:
+        return self.rng.randint(1, self.params["users"])
+
+
+SCENARIOS = {}
+
+def scenario(name: str):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+@scenario("signin")
+async def signin(ctx: Context) -> dict:
+    # Cada inicio de sesión verifica bcrypt con el coste real (BCRYPT_ROUNDS); por eso usa menos peticiones
+    result = await measure(
+        lambda i: ctx.client.post("/auth/signin", data={"username": user_email(ctx.user_id()), "password": PASSWORD}),
+        ctx.signin_requests, ctx.concurrency,
+    )
+    # bcrypt usa como mucho un núcleo por hilo del pool de hashing: comparable entre máquinas distintas
+    cores = min(settings.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+    result["extra"].update({"hash_cores": cores, "rps_per_core": round(result["throughput_rps"] / cores, 2)})
+    return result
+
+@scenario("user_me_cached")
+async def user_me_cached(ctx: Context) -> dict:
+    # Siempre el mismo token: tras la primera petición el payload sale de la caché de tokens
+    headers = {"Authorization": f"Bearer {await create_access_token({'id': ctx.user_id()})}"}
+    return await measure(lambda i: ctx.client.get("/user/me", headers=headers), ctx.requests, ctx.concurrency, warmup=1)
+
+@scenario("user_me_uncached")
+async def user_me_uncached(ctx: Context) -> dict:
+    # Un token distinto por petición (jti único), así que todos se verifican
+    tokens = [await create_access_token({"id": ctx.user_id(), "jti": f"bench-{i}"}) for i in range(ctx.requests)]
+    return await measure(
+        lambda i: ctx.client.get("/user/me", headers={"Authorization": f"Bearer {tokens[i]}"}),
+        ctx.requests, ctx.concurrency,
+    )
+
+
+async def run(params: dict, requests: int, signin_requests: int, concurrency: int, patterns: list[str], log) -> dict:
+    scenarios = {}
+    # Las excepciones no controladas de la app cuentan como 500 en vez de abortar la ejecución
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        ctx = Context(client, params, requests, signin_requests, concurrency)
+        for name, fn in SCENARIOS.items():
+            if patterns and not any(fnmatch(f"auth.{name}", pattern) for pattern in patterns):
+                continue
+            log(f"auth.{name}")
+            scenarios[name] = await fn(ctx)
+        info = {
+            "dialect": engine.dialect.name,
+            "hashing": (await client.get("/hashing/stats")).json(),
+            "pool": (await client.get("/pool/stats")).json(),
+        }
+    engine.dispose()
+    return {"scenarios": scenarios, "info": info}
@@ -0,0 +1,36 @@
+"""Shape of the synthetic data set, shared by the seeder and the scenarios of both services."""
+import json
+import random
+
+PASSWORD = "benchmark-password"
+# Cambiarlo al modificar la forma de los datos: las bases sembradas con otra versión se vuelven a sembrar
+DATASET_VERSION = 2
+# Filas de los escenarios product_stream_<n>: la siembra necesita al menos la mayor
+STREAM_ROWS = (10_000, 100_000, 1_000_000)
+
+
+def user_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example.com"
+
+def vocabulary(seed: int, size: int = 2000) -> list[str]:
+    """Pseudo-words used for product names and descriptions (and as search terms)."""
+    rng = random.Random(seed)
+    syllables = ["ca", "lo", "mi", "ta", "re", "su", "no", "pa", "ve", "di", "ro", "ga", "le", "bo", "fi", "te"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def product_status(product_id: int) -> str:
+    # Fijo por id, para que los escenarios sepan qué productos están activos sin consultar
+    if product_id % 20 == 0:
+        return "inactive"
+    if product_id % 20 == 1:
+        return "out_of_stock"
+    return "active"
+
+def is_active(product_id: int) -> bool:
+    return product_status(product_id) == "active"
+
+def signature(params: dict) -> str:
+    return json.dumps({**params, "version": DATASET_VERSION}, sort_keys=True)
@@ -0,0 +1,288 @@
+"""
+Scenarios for `service_product`. Imported in a process whose sys.path starts with
+`service_product` and whose environment already points DATABASE_URL at the seeded
+database (see benchmarks/__main__.py).
+"""
+import random
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+from fnmatch import fnmatch
+
+import httpx
+
+from app.main import app
+from app.core.metrics import metrics as request_metrics
+from app.db.database import engine
+from benchmarks.runner import consume_asgi_stream, measure, summarize
+from benchmarks.dataset import STREAM_ROWS, is_active, vocabulary
+
+PAGE_SIZE = 50
+BATCH_SIZE = 20
+LARGE_CART = 20
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, params: dict, requests: int, concurrency: int):
+        self.client = client
+        self.params = params
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rng = random.Random(params["seed"])
+        self.words = vocabulary(params["seed"])
+        # Reservado para order_stock_contention, que le pone stock: el resto de escenarios no lo usa
+        self.contended_product_id = next(i for i in range(params["products"], 0, -1) if is_active(i))
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.params["products"])
+
+    def active_product_ids(self, count: int) -> list[int]:
+        ids = set()
+        while len(ids) < count:
+            product_id = self.product_id()
+            if is_active(product_id) and product_id != self.contended_product_id:
+                ids.add(product_id)
+        return sorted(ids)
+
+    def user_id(self) -> int:
+        return self.rng.randint(1, self.params["users"])
+
+
+SCENARIOS = {}
+
+def scenario(name: str):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+@scenario("product_list")
+async def product_list(ctx: Context) -> dict:
+    last_cursor = max(ctx.params["products"] - PAGE_SIZE, 0)
+    return await measure(
+        lambda i: ctx.client.get("/products/", params={"limit": PAGE_SIZE, "cursor": ctx.rng.randint(0, last_cursor)}),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+@scenario("product_list_sparse")
+async def product_list_sparse(ctx: Context) -> dict:
+    # Mismas páginas que product_list con solo tres columnas: compara latencia y mean_response_bytes
+    last_cursor = max(ctx.params["products"] - PAGE_SIZE, 0)
+    return await measure(
+        lambda i: ctx.client.get("/products/", params={"limit": PAGE_SIZE, "cursor": ctx.rng.randint(0, last_cursor), "fields": "id,name,price"}),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+@scenario("product_list_filtered")
+async def product_list_filtered(ctx: Context) -> dict:
+    return await measure(
+        lambda i: ctx.client.get("/products/", params={
+            "limit": PAGE_SIZE,
+            "status": "active",
+            "category_id": ctx.rng.randint(1, ctx.params["categories"]),
+        }),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+@scenario("product_get")
+async def product_get(ctx: Context) -> dict:
+    return await measure(lambda i: ctx.client.get(f"/products/{ctx.product_id()}"), ctx.requests, ctx.concurrency)
+
+@scenario("product_batch")
+async def product_batch(ctx: Context) -> dict:
+    # Un carrito de 20 productos en una petición, frente a 20 llamadas a product_get
+    return await measure(
+        lambda i: ctx.client.get("/products/batch", params={"ids": ",".join(str(ctx.product_id()) for _ in range(BATCH_SIZE))}),
+        ctx.requests, ctx.concurrency,
+    )
+
+@scenario("product_search")
+async def product_search(ctx: Context) -> dict:
+    # La primera búsqueda construye el índice en memoria (en MySQL usa FULLTEXT y no hay construcción)
+    start = time.perf_counter()
+    await ctx.client.get("/products/search", params={"q": ctx.words[0]})
+    first_query_seconds = time.perf_counter() - start
+    result = await measure(
+        lambda i: ctx.client.get("/products/search", params={"q": ctx.rng.choice(ctx.words), "limit": 20}),
+        ctx.requests, ctx.concurrency,
+    )
+    result["extra"]["first_query_seconds"] = round(first_query_seconds, 3)
+    return result
+
+def _product_stream(stream_rows: int):
+    async def product_stream(ctx: Context) -> dict:
+        # Las últimas `stream_rows` filas: peak_bytes debe quedarse plano de 10k a 1M filas
+        query = f"stream=ndjson&cursor={max(ctx.params['products'] - stream_rows, 0)}"
+        start = time.perf_counter()
+        status, received_bytes, rows = await consume_asgi_stream(app, "/products/", query)
+        elapsed = time.perf_counter() - start
+
+        # Segunda pasada con tracemalloc (que ralentiza bastante), solo para medir memoria
+        tracemalloc.start()
+        try:
+            await consume_asgi_stream(app, "/products/", query)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return summarize([elapsed], elapsed, 1, 1, int(status != 200 or rows != stream_rows), extra={
+            "rows": rows,
+            "bytes": received_bytes,
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else 0.0,
+            "peak_bytes": peak,
+        })
+    return product_stream
+
+for _stream_rows in STREAM_ROWS:
+    scenario(f"product_stream_{_stream_rows}")(_product_stream(_stream_rows))
+
+def query_counter(method: str, route: str) -> Callable[[], float]:
+    """
+    Mean SQL statements per request to `route` from now on, read from the
+    `db_queries_per_request` histogram that the metrics middleware fills per request.
+    """
+    def totals() -> tuple[float, int]:
+        _, queries, requests = request_metrics.queries.values.get((method, route), (None, 0.0, 0))
+        return queries, requests
+
+    start_queries, start_requests = totals()
+
+    def mean() -> float:
+        queries, requests = totals()
+        return round((queries - start_queries) / (requests - start_requests), 2) if requests > start_requests else 0.0
+    return mean
+
+def _order_create(cart_size: int):
+    async def order_create(ctx: Context) -> dict:
+        # Carritos generados de antemano: con 1000 líneas, elegir los ids pesaría en la latencia medida
+        requests, concurrency = ctx.requests, ctx.concurrency
+        if cart_size > LARGE_CART:
+            # Un pedido grande retiene el bloqueo de escritura de SQLite hasta agotar el timeout de los demás:
+            # se crean de uno en uno y se mide el tiempo y las consultas de cada pedido
+            requests, concurrency = max(ctx.requests // 10, 10), 1
+        carts = [
+            {"user_id": ctx.user_id(), "items": [{"product_id": product_id, "quantity": 1} for product_id in ctx.active_product_ids(cart_size)]}
+            for _ in range(requests)
+        ]
+        queries = query_counter("POST", "/orders/")
+        start = time.perf_counter()
+        result = await measure(lambda i: ctx.client.post("/orders/", json=carts[i]), requests, concurrency)
+        result["extra"]["wall_seconds"] = round(time.perf_counter() - start, 3)
+        # Con ORDER_GROUP_COMMIT las consultas del lote no cuentan en ninguna petición
+        result["extra"]["queries_per_request"] = queries()
+        result["extra"]["lines_per_second"] = round(result["throughput_rps"] * cart_size, 1)
+        return result
+    return order_create
+
+for _cart_size in (1, 5, 10, 20, 100, 1000):
+    scenario(f"order_create_cart_{_cart_size}")(_order_create(_cart_size))
+
+def _order_quote(cart_size: int):
+    async def order_quote(ctx: Context) -> dict:
+        # Carritos generados de antemano: con 1000 líneas, elegir los ids pesaría en la latencia medida
+        carts = [
+            {"user_id": ctx.user_id(), "items": [{"product_id": product_id, "quantity": 2} for product_id in ctx.active_product_ids(cart_size)]}
+            for _ in range(16)
+        ]
+        # La primera cotización del proceso carga la instantánea de precios entera
+        start = time.perf_counter()
+        await ctx.client.post("/orders/quote", json=carts[0])
+        first_quote_seconds = time.perf_counter() - start
+        result = await measure(lambda i: ctx.client.post("/orders/quote", json=carts[i % len(carts)]), ctx.requests, ctx.concurrency)
+        result["extra"]["first_quote_seconds"] = round(first_quote_seconds, 3)
+        result["extra"]["lines_per_second"] = round(result["throughput_rps"] * cart_size, 1)
+        return result
+    return order_quote
+
+for _cart_size in (1, 10, 100, 1000):
+    scenario(f"order_quote_cart_{_cart_size}")(_order_quote(_cart_size))
+
+@scenario("order_create_idempotent")
+async def order_create_idempotent(ctx: Context) -> dict:
+    # Todas las peticiones repiten la misma clave: solo la primera debe crear el pedido
+    key = f"bench-{uuid.uuid4()}"
+    body = {"user_id": ctx.user_id(), "items": [{"product_id": product_id, "quantity": 1} for product_id in ctx.active_product_ids(3)]}
+    created = 0
+
+    def count_created(response: httpx.Response) -> None:
+        nonlocal created
+        if response.status_code == 201 and "Idempotent-Replayed" not in response.headers:
+            created += 1
+
+    result = await measure(
+        lambda i: ctx.client.post("/orders/", json=body, headers={"Idempotency-Key": key}),
+        ctx.requests, ctx.concurrency, on_response=count_created,
+    )
+    result["extra"]["orders_created"] = created
+    result["errors"] += abs(created - 1)
+    return result
+
+@scenario("order_stock_contention")
+async def order_stock_contention(ctx: Context) -> dict:
+    # Más pedidos que unidades del mismo producto: los que sobran deben recibir 409, nunca sobrevender
+    product_id = ctx.contended_product_id
+    stock = max(ctx.requests // 2, 1)
+    await ctx.client.put(f"/products/{product_id}", json={"stock": stock, "status": "active"})
+    sold = rejected = 0
+
+    def count_outcome(response: httpx.Response) -> None:
+        nonlocal sold, rejected
+        sold += response.status_code == 201
+        rejected += response.status_code == 409
+
+    result = await measure(
+        lambda i: ctx.client.post("/orders/", json={"user_id": ctx.user_id(), "items": [{"product_id": product_id, "quantity": 1}]}),
+        ctx.requests, ctx.concurrency, ok_status=(201, 409), on_response=count_outcome,
+    )
+    remaining = (await ctx.client.get(f"/products/{product_id}")).json()["stock"]
+    oversold = sold > stock or remaining != stock - sold
+    result["extra"].update({"stock": stock, "sold": sold, "rejected": rejected, "remaining": remaining, "oversold": oversold})
+    result["errors"] += int(oversold)
+    return result
+
+@scenario("order_list")
+async def order_list(ctx: Context) -> dict:
+    last_cursor = max(ctx.params["orders"] - PAGE_SIZE, 0)
+    return await measure(
+        lambda i: ctx.client.get("/orders/", params={"limit": PAGE_SIZE, "cursor": ctx.rng.randint(0, last_cursor)}),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+@scenario("order_list_sparse")
+async def order_list_sparse(ctx: Context) -> dict:
+    last_cursor = max(ctx.params["orders"] - PAGE_SIZE, 0)
+    return await measure(
+        lambda i: ctx.client.get("/orders/", params={"limit": PAGE_SIZE, "cursor": ctx.rng.randint(0, last_cursor), "fields": "status,total_amount"}),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+@scenario("order_list_user_expand")
+async def order_list_user_expand(ctx: Context) -> dict:
+    return await measure(
+        lambda i: ctx.client.get(f"/orders/user/{ctx.user_id()}", params={"limit": 20, "expand": "products"}),
+        ctx.requests, ctx.concurrency, warmup=1,
+    )
+
+
+async def run(params: dict, requests: int, concurrency: int, patterns: list[str], log) -> dict:
+    scenarios = {}
+    # Las excepciones no controladas de la app cuentan como 500 en vez de abortar la ejecución
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        ctx = Context(client, params, requests, concurrency)
+        for name, fn in SCENARIOS.items():
+            if patterns and not any(fnmatch(f"product.{name}", pattern) for pattern in patterns):
+                continue
+            log(f"product.{name}")
+            scenarios[name] = await fn(ctx)
+        info = {
+            "dialect": engine.dialect.name,
+            "cache": (await client.get("/cache/stats")).json(),
+            "pool": (await client.get("/pool/stats")).json(),
+            # ORDER_GROUP_COMMIT=true en el entorno compara el modo por lotes con el commit por petición
+            "order_batches": (await client.get("/pool/order-batches")).json(),
+        }
+    await engine.dispose()
+    return {"scenarios": scenarios, "info": info}
@@ -0,0 +1,193 @@
+"""Load generation, latency statistics and result comparison shared by every scenario."""
+import asyncio
+import itertools
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+# Métricas que cuentan como regresión si empeoran más que el umbral (True = más alto es mejor)
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "latency_ms.p50": False,
+    "latency_ms.p95": False,
+    "extra.peak_bytes": False,
+    "extra.rows_per_second": True,
+    "extra.queries_per_request": False,
+    "extra.rps_per_core": True,
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(latencies: list[float], elapsed: float, requests: int, concurrency: int, errors: int, extra: dict | None = None) -> dict:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p90": round(percentile(latencies_ms, 90), 3),
+            "p95": round(percentile(latencies_ms, 95), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+            "max": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+        },
+        "extra": extra or {},
+    }
+
+async def measure(
+    operation: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+    ok_status: tuple[int, ...] = (200, 201),
+    on_response: Callable[[httpx.Response], None] | None = None,
+) -> dict:
+    """
+    Call `operation(i)` for i in range(requests) from `concurrency` concurrent workers
+    and summarize the latencies. Responses with a status outside `ok_status` count as
+    errors (their latency is still recorded). `extra.mean_response_bytes` is the
+    average body size, to compare payloads between variants of one endpoint.
+    """
+    for i in range(warmup):
+        await operation(-1 - i)
+
+    counter = itertools.count()
+    latencies: list[float] = []
+    response_bytes = 0
+    errors = 0
+    first_errors: list[str] = []
+
+    async def worker():
+        nonlocal errors, response_bytes
+        # Los workers comparten el contador: el total de peticiones no depende de la concurrencia
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            response = await operation(i)
+            latencies.append(time.perf_counter() - start)
+            response_bytes += len(response.content)
+            if response.status_code not in ok_status:
+                errors += 1
+                if len(first_errors) < 3:
+                    first_errors.append(f"{response.status_code} {response.text[:200]}")
+            if on_response is not None:
+                on_response(response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - start, requests, concurrency, errors)
+    result["extra"]["mean_response_bytes"] = round(response_bytes / len(latencies)) if latencies else 0
+    if first_errors:
+        result["extra"]["first_errors"] = first_errors
+    return result
+
+async def consume_asgi_stream(app, path: str, query: str = "") -> tuple[int, int, int]:
+    """
+    Drive `app` directly and discard the body as it arrives, returning
+    (status, bytes, lines). httpx's ASGITransport buffers the whole body, which
+    would hide the memory profile of a streaming endpoint.
+    """
+    status = 0
+    received_bytes = 0
+    lines = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, received_bytes, lines
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            received_bytes += len(body)
+            lines += body.count(b"\n")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return status, received_bytes, lines
+
+
+def git_commit(cwd: str) -> str | None:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+def metadata(root: str, **extra) -> dict:
+    return {
+        "commit": git_commit(root),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def _metric(result: dict, path: str) -> float | None:
+    value = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) and value > 0 else None
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Compare two result files scenario by scenario and return the regressions:
+    metrics that got worse by more than `threshold` (a fraction, e.g. 0.1 = 10%).
+    """
+    regressions = []
+    for name, result in sorted(current["scenarios"].items()):
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        if result["errors"] > previous["errors"]:
+            regressions.append(f"{name} errors: {previous['errors']} -> {result['errors']}")
+        for path, higher_is_better in COMPARED_METRICS.items():
+            old, new = _metric(previous, path), _metric(result, path)
+            if old is None or new is None or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{name} {path}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+def print_summary(results: dict, stream=sys.stderr) -> None:
+    print(f"{'scenario':<40} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}", file=stream)
+    for name, result in sorted(results["scenarios"].items()):
+        latency = result["latency_ms"]
+        print(
+            f"{name:<40} {result['throughput_rps']:>10} {latency['p50']:>10} {latency['p95']:>10} {latency['p99']:>10} {result['errors']:>7}",
+            file=stream,
+        )
+
+def load(path: str) -> dict:
+    with open(path) as results_file:
+        return json.load(results_file)
@@ -0,0 +1,198 @@
+"""
+Deterministic synthetic data for the benchmarks.
+
+Runs with `service_product` on sys.path (it owns every table). The data set is
+tagged with a signature of its parameters in `benchmark_seed`, so later runs with
+the same parameters reuse it instead of seeding again.
+"""
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, func, inspect, insert, select
+from sqlalchemy.engine import Engine
+
+from common_db.base import Base
+from common_db.models import User
+from app.core.pricing import order_total, price_line
+from app.models.models import Category, Order, OrderDailyStats, OrderItem, OrderStatus, Product, ProductDailySales, ProductStatus
+from benchmarks.dataset import PASSWORD, product_status, signature, user_email, vocabulary
+
+CHUNK_SIZE = 10_000
+IVA_RATES = (Decimal("0.00"), Decimal("0.05"), Decimal("0.19"))
+
+_marker = Table("benchmark_seed", MetaData(), Column("signature", String(255), primary_key=True))
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _insert(engine: Engine, table, rows) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        with engine.begin() as connection:
+            connection.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+def _has_rows(engine: Engine) -> bool:
+    existing = set(inspect(engine).get_table_names())
+    with engine.connect() as connection:
+        return any(
+            connection.scalar(select(func.count()).select_from(table)) > 0
+            for table in Base.metadata.sorted_tables if table.name in existing
+        )
+
+def _stored_signature(engine: Engine) -> str | None:
+    if not inspect(engine).has_table(_marker.name):
+        return None
+    with engine.connect() as connection:
+        return connection.scalar(select(_marker.c.signature))
+
+
+def _users(count: int):
+    # Un único hash bcrypt para todos: calcularlo por usuario costaría minutos
+    from passlib.context import CryptContext
+    hashed_password = CryptContext(schemes=["bcrypt"]).hash(PASSWORD)
+    for user_id in range(1, count + 1):
+        yield {"id": user_id, "name": f"User {user_id}", "email": user_email(user_id), "hashed_password": hashed_password, "is_active": True}
+
+def _products(rng: random.Random, words: list[str], count: int, categories: int, prices: list[Decimal], ivas: list[Decimal]):
+    for product_id in range(1, count + 1):
+        price = Decimal(rng.randint(100, 500_000)) / 100
+        iva = rng.choice(IVA_RATES)
+        prices.append(price)
+        ivas.append(iva)
+        yield {
+            "id": product_id,
+            "name": " ".join(rng.choices(words, k=3)),
+            "description": " ".join(rng.choices(words, k=12)),
+            "img_url": None,
+            "price": price,
+            "iva": iva,
+            "category_id": rng.randint(1, categories),
+            "stock": None,
+            "status": ProductStatus(product_status(product_id)),
+        }
+
+def _orders(rng: random.Random, count: int, users: int, prices: list[Decimal], ivas: list[Decimal], items: list, order_stats, product_sales):
+    now = datetime.utcnow().replace(microsecond=0)
+    statuses = list(OrderStatus)
+    for order_id in range(1, count + 1):
+        created_at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        status = rng.choice(statuses)
+        subtotal = iva_total = Decimal("0")
+        for product_id in rng.sample(range(1, len(prices) + 1), rng.randint(1, 5)):
+            quantity = rng.randint(1, 3)
+            price, iva = prices[product_id - 1], ivas[product_id - 1]
+            item_subtotal, item_iva_amount = price_line(quantity, price, iva)
+            items.append({
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price_at_time_of_order": price,
+                "iva_at_time_of_order": iva,
+                "subtotal": item_subtotal,
+                "iva_amount": item_iva_amount,
+                "line_total": item_subtotal + item_iva_amount,
+            })
+            subtotal += item_subtotal
+            iva_total += item_iva_amount
+            if status != OrderStatus.CANCELED:
+                sales = product_sales[(created_at.date(), product_id)]
+                sales[0] += quantity
+                sales[1] += item_subtotal
+                sales[2] += item_iva_amount
+        total_amount = order_total(subtotal, iva_total)
+        stats = order_stats[(created_at.date(), status)]
+        stats[0] += 1
+        stats[1] += subtotal
+        stats[2] += iva_total
+        stats[3] += total_amount
+        yield {
+            "id": order_id,
+            "user_id": rng.randint(1, users),
+            "subtotal": subtotal,
+            "iva_total": iva_total,
+            "total_amount": total_amount,
+            "status": status,
+            "created_at": created_at,
+        }
+
+
+def seed(engine: Engine, params: dict, reseed: bool = False) -> dict:
+    """
+    Make sure the database holds the data set described by `params`
+    (users, categories, products, orders, seed). Returns timing information.
+
+    A database seeded with other parameters is dropped and seeded again; any other
+    non-empty database is left alone unless `reseed` is set.
+    """
+    expected = signature(params)
+    stored = _stored_signature(engine)
+    if not reseed and stored == expected:
+        log("reusing seeded database")
+        return {"reused": True}
+    # Una base sembrada con otros parámetros se rehace; cualquier otra con datos no se toca
+    if not reseed and stored is None and _has_rows(engine):
+        raise SystemExit(
+            "The benchmark database already contains data that was not seeded by the benchmarks; "
+            "pass --reseed to drop and recreate every table."
+        )
+
+    start = time.perf_counter()
+    _marker.drop(engine, checkfirst=True)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(params["seed"])
+    words = vocabulary(params["seed"])
+    prices: list[Decimal] = []
+    ivas: list[Decimal] = []
+
+    _insert(engine, User.__table__, _users(params["users"]))
+    _insert(engine, Category.__table__, ({"id": i, "name": f"Category {i}"} for i in range(1, params["categories"] + 1)))
+    log(f"seeding {params['products']} products")
+    _insert(engine, Product.__table__, _products(rng, words, params["products"], params["categories"], prices, ivas))
+
+    log(f"seeding {params['orders']} orders")
+    items: list[dict] = []
+    order_stats = defaultdict(lambda: [0, Decimal("0"), Decimal("0"), Decimal("0")])
+    product_sales = defaultdict(lambda: [0, Decimal("0"), Decimal("0")])
+    _insert(engine, Order.__table__, _orders(rng, params["orders"], params["users"], prices, ivas, items, order_stats, product_sales))
+    _insert(engine, OrderItem.__table__, items)
+    _insert(engine, OrderDailyStats.__table__, (
+        {"day": day, "status": status, "orders": orders, "subtotal": subtotal, "iva_amount": iva_amount, "total_amount": total_amount}
+        for (day, status), (orders, subtotal, iva_amount, total_amount) in order_stats.items()
+    ))
+    _insert(engine, ProductDailySales.__table__, (
+        {"day": day, "product_id": product_id, "units": units, "subtotal": subtotal, "iva_amount": iva_amount}
+        for (day, product_id), (units, subtotal, iva_amount) in product_sales.items()
+    ))
+
+    _marker.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(_marker), {"signature": expected})
+    seconds = time.perf_counter() - start
+    log(f"seeded in {seconds:.1f}s")
+    return {"reused": False, "seconds": round(seconds, 3)}
+
+def seed_url(url: str, params: dict, reseed: bool = False) -> dict:
+    engine = create_engine(url)
+    try:
+        return seed(engine, params, reseed)
+    finally:
+        engine.dispose()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark of response serialization, without database or HTTP: rows/s of
+the `response_model` path (per-row `model_validate`, then FastAPI's own
+`serialize_response` and `JSONResponse`) against the fast path of
+app/core/serialization.py (one batched TypeAdapter validation and `dump_json`).
+
+Runs with one service on sys.path, like the scenario modules.
+"""
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.runner import summarize
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+
+
+def _product_rows(count: int):
+    from app.models.models import Product, ProductStatus
+    from app.schemas.product import ProductOut
+    now = datetime.utcnow()
+    return ProductOut, [
+        Product(
+            id=i, name=f"Product {i}", description="Synthetic description " * 8, img_url=None,
+            price=Decimal("1234.50"), iva=Decimal("0.19"), category_id=i % 50, stock=None,
+            status=ProductStatus.ACTIVE, updated_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+def _order_rows(count: int):
+    from app.models.models import Order, OrderStatus
+    from app.schemas.order import OrderOut
+    now = datetime.utcnow()
+    return OrderOut, [
+        Order(
+            id=i, user_id=i % 1000, subtotal=Decimal("2469.00"), iva_total=Decimal("469.1100"),
+            total_amount=Decimal("2938.11"), status=OrderStatus.PENDING, created_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+def _user_rows(count: int):
+    from app.models.models import User
+    from app.schema.user import UserOut
+    now = datetime.utcnow()
+    return UserOut, [
+        User(id=i, name=f"User {i}", email=f"user{i}@bench.example.com", hashed_password="x", is_active=True, created_at=now)
+        for i in range(1, count + 1)
+    ]
+
+SCHEMAS = {"product": (_product_rows, _order_rows), "auth": (_user_rows,)}
+
+
+def _response_model_path(schema):
+    field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+
+    async def encode(rows) -> bytes:
+        models = [schema.model_validate(row) for row in rows]
+        content = await serialize_response(field=field, response_content=models)
+        return JSONResponse(content).body
+    return encode
+
+def _fast_path(schema):
+    from app.core.serialization import json_response, type_adapter
+
+    async def encode(rows) -> bytes:
+        models = type_adapter(list[schema]).validate_python(rows, from_attributes=True)
+        return json_response(list[schema], models).body
+    return encode
+
+async def _measure(encode, rows, repeat: int) -> dict:
+    await encode(rows[:10])
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await encode(rows)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return summarize(timings, sum(timings), repeat, 1, 0, extra={
+        "rows": len(rows),
+        "bytes": len(body),
+        "rows_per_second": round(len(rows) / best, 1),
+    })
+
+async def run(service: str, row_counts: list[int], log) -> dict:
+    scenarios = {}
+    for build in SCHEMAS[service]:
+        for count in row_counts:
+            schema, rows = build(count)
+            repeat = min(5, max(1, 100_000 // count))
+            for path, encoder in (("response_model", _response_model_path), ("fast_path", _fast_path)):
+                name = f"{schema.__name__}.{path}.{count}"
+                log(name)
+                scenarios[name] = await _measure(encoder(schema), rows, repeat)
+    return {"scenarios": scenarios, "info": {}}
+
+def main(service: str, row_counts: list[int], log) -> dict:
+    return asyncio.run(run(service, row_counts, log))
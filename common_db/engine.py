@@ -0,0 +1,85 @@
+import time
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+
+def _instrumented_pool(pool_class: type[QueuePool]) -> type[QueuePool]:
+    # Clase propia por engine: las estadísticas sobreviven a pool.recreate() (p. ej. tras dispose())
+    stats = PoolStats()
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                stats.checkout_timeouts += 1
+                raise
+            finally:
+                waited = time.perf_counter() - start
+                stats.wait_seconds_total += waited
+                stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+            stats.checkouts += 1
+            return connection
+
+    InstrumentedPool.stats = stats
+    return InstrumentedPool
+
+
+def _pool_options(url: str, pool_class: type[QueuePool], settings) -> dict:
+    options = {"echo": settings.DB_ECHO, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    # SQLite en memoria no usa un pool con cola
+    if make_url(url).get_backend_name() == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return options
+    return {
+        **options,
+        "poolclass": _instrumented_pool(pool_class),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def create_db_engine(url: str, settings) -> Engine:
+    """Synchronous engine configured from the service's DB_* pool settings."""
+    options = _pool_options(url, QueuePool, settings)
+    if make_url(url).get_backend_name() == "sqlite":
+        # Las sesiones de get_db se usan desde el threadpool de FastAPI
+        options["connect_args"] = {"check_same_thread": False}
+    return create_engine(url, **options)
+
+
+def create_async_db_engine(url: str, settings) -> AsyncEngine:
+    """Async engine configured from the service's DB_* pool settings."""
+    return create_async_engine(url, **_pool_options(url, AsyncAdaptedQueuePool, settings))
+
+
+def get_pool_stats(engine: Engine | AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = getattr(pool, "stats", None)
+    if stats is None:
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__mro__[1].__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": stats.checkouts,
+        "checkout_timeouts": stats.checkout_timeouts,
+        "wait_seconds_total": round(stats.wait_seconds_total, 6),
+        "wait_seconds_max": round(stats.wait_seconds_max, 6),
+    }
@@ -0,0 +1,194 @@
+import bisect
+import logging
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import Response
+from common_db.engine import get_pool_stats
+
+logger = logging.getLogger("metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, labels, buckets
+        # label_values -> [conteos por bucket (no acumulados) + overflow, suma, total]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        entry = self.values.setdefault(label_values, [[0] * (len(self.buckets) + 1), 0.0, 0])
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labels, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[_RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _record_query(context) -> None:
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    # Una sola vez por sentencia, aunque un error al leer sus filas dispare luego handle_error
+    context._query_start = None
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+class Metrics:
+    def __init__(self, n_plus_one_threshold: int):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.engines: list[Engine | AsyncEngine] = []
+        self.requests = Counter("http_requests_total", "HTTP requests served.", ("method", "route", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "HTTP request latency.", LATENCY_BUCKETS, ("method", "route"))
+        self.response_size = Histogram("http_response_size_bytes", "HTTP response body size.", SIZE_BUCKETS, ("method", "route"))
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+        self.queries = Histogram("db_queries_per_request", "SQL statements executed per request.", QUERY_COUNT_BUCKETS, ("method", "route"))
+        self.db_time = Histogram("db_time_per_request_seconds", "Time spent in SQL statements per request.", LATENCY_BUCKETS, ("method", "route"))
+        self.n_plus_one = Counter("db_n_plus_one_requests_total", "Requests above the query count threshold.", ("method", "route"))
+
+    def instrument_engine(self, engine: Engine | AsyncEngine) -> None:
+        self.engines.append(engine)
+        sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+        # El inicio va en el contexto de ejecución de cada sentencia, no en la conexión: si la sentencia falla
+        # no queda nada colgado en la conexión del pool que descuadre las siguientes
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._query_start = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            _record_query(context)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _handle_error(exception_context):
+            # Las sentencias que fallan también cuentan, con el tiempo que tardó la base de datos en rechazarlas
+            _record_query(exception_context.execution_context)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.latency, self.response_size, self.in_flight, self.queries, self.db_time, self.n_plus_one):
+            lines += metric.render()
+        for index, engine in enumerate(self.engines):
+            for key, value in get_pool_stats(engine).items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'db_pool_{key}{{engine="{index}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+        return Response(self.render(), media_type="text/plain; version=0.0.4")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, response size, in-flight requests and the
+    SQL statements (count and time) executed while serving each request.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight.dec()
+            _request_stats.reset(token)
+
+            # Se usa la plantilla de la ruta (p. ej. /products/{product_id}) para acotar la cardinalidad
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            metrics.requests.inc(method, route, response["status"])
+            metrics.latency.observe(elapsed, method, route)
+            metrics.response_size.observe(response["size"], method, route)
+            metrics.queries.observe(stats.queries, method, route)
+            metrics.db_time.observe(stats.db_seconds, method, route)
+
+            if stats.queries > metrics.n_plus_one_threshold:
+                metrics.n_plus_one.inc(method, route)
+                logger.warning(
+                    "Possible N+1: %s %s executed %d queries (threshold %d)",
+                    method, route, stats.queries, metrics.n_plus_one_threshold,
+                )
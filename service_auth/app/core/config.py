@@ -11,10 +11,36 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_PORT: int
 
+    # Pool de conexiones (ajustar según max_connections de MySQL y el número de réplicas)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+
+    # Se registra un aviso de posible N+1 si una petición ejecuta más consultas que este umbral
+    METRICS_N_PLUS_ONE_THRESHOLD: int = 20
+
+    # URL completa opcional (p. ej. "sqlite:///./test.db"); si se define, reemplaza a DB_*
+    DATABASE_URL: str | None = None
+
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     ALGORITHM: str
 
+    # Claves PEM para algoritmos asimétricos (RS256, ES256...); con HS* se usa SECRET_KEY
+    JWT_PRIVATE_KEY_PATH: str | None = None
+    JWT_PUBLIC_KEY_PATH: str | None = None
+    JWT_KEY_ID: str = "auth-key-1"
+
+    # Número máximo de tokens verificados que se guardan en memoria
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Coste de bcrypt y número de hilos dedicados a hashear/verificar contraseñas
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
     FRONTEND_URL: str
 
 
@@ -0,0 +1,6 @@
+from app.core.config import settings
+from app.db.database import engine
+from common_db.metrics import Metrics
+
+metrics = Metrics(settings.METRICS_N_PLUS_ONE_THRESHOLD)
+metrics.instrument_engine(engine)
@@ -1,21 +1,97 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer 
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi import Depends
 from app.core.config import settings
 from app.schema.auth import Token
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 security = HTTPBearer()
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt libera el GIL, así que un pool de hilos acotado basta para sacarlo del event loop
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_stats = {"pending": 0, "running": 0, "completed": 0}
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def _track_running(fn, *args):
+    _hash_stats["running"] += 1
+    try:
+        return fn(*args)
+    finally:
+        _hash_stats["running"] -= 1
+
+async def _run_in_hash_pool(fn, *args):
+    _hash_stats["pending"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, _track_running, fn, *args)
+    finally:
+        _hash_stats["pending"] -= 1
+        _hash_stats["completed"] += 1
+
+def get_hashing_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "running": _hash_stats["running"],
+        "queued": max(_hash_stats["pending"] - _hash_stats["running"], 0),
+        "completed": _hash_stats["completed"],
+    }
+
+async def get_password_hash(password: str) -> str:
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify the password and, if its hash uses outdated settings (e.g. fewer rounds), return a new hash."""
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def _read_key(path: str | None, name: str) -> str:
+    if not path:
+        raise RuntimeError(f"{name} is required when ALGORITHM is {settings.ALGORITHM}")
+    with open(path) as key_file:
+        return key_file.read()
+
+if settings.ALGORITHM.startswith("HS"):
+    _signing_key = _verification_key = settings.SECRET_KEY
+else:
+    _signing_key = _read_key(settings.JWT_PRIVATE_KEY_PATH, "JWT_PRIVATE_KEY_PATH")
+    _verification_key = _read_key(settings.JWT_PUBLIC_KEY_PATH, "JWT_PUBLIC_KEY_PATH")
+
+def get_jwks() -> dict:
+    """Public keys in JWKS format, so other services can verify tokens locally."""
+    if settings.ALGORITHM.startswith("HS"):
+        return {"keys": []}
+    key = jwk.construct(_verification_key, settings.ALGORITHM).to_dict()
+    key.update({"kid": settings.JWT_KEY_ID, "use": "sig"})
+    return {"keys": [key]}
+
+# Payloads ya verificados, indexados por el hash del token y válidos hasta su `exp`
+_token_cache: OrderedDict[str, dict] = OrderedDict()
+
+def _get_cached_payload(token_digest: str) -> dict | None:
+    payload = _token_cache.get(token_digest)
+    if payload is None:
+        return None
+    if payload.get("exp", 0) <= time.time():
+        del _token_cache[token_digest]
+        return None
+    _token_cache.move_to_end(token_digest)
+    return payload
+
+def _cache_payload(token_digest: str, payload: dict) -> None:
+    if "exp" not in payload:
+        return
+    _token_cache[token_digest] = payload
+    while len(_token_cache) > settings.TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
 
 async def create_access_token(data: dict, access_token_expiry: Optional[int] = None) -> str:
     to_encode = data.copy()
@@ -25,7 +101,7 @@ async def create_access_token(data: dict, access_token_expiry: Optional[int] = N
 
     to_encode.update({"exp": int(expire.timestamp())})
 
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return jwt.encode(to_encode, _signing_key, algorithm=settings.ALGORITHM, headers={"kid": settings.JWT_KEY_ID})
 
 async def get_user_token(id: int, refresh_token: Optional[str] = None) -> Token:
     payload = {"id": id}
@@ -42,8 +118,14 @@ async def get_user_token(id: int, refresh_token: Optional[str] = None) -> Token:
     )
 
 async def get_token_payload(token: str) -> dict:
+    token_digest = hashlib.sha256(token.encode()).hexdigest()
+    payload = _get_cached_payload(token_digest)
+    if payload is not None:
+        return payload
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _verification_key, algorithms=[settings.ALGORITHM])
+        _cache_payload(token_digest, payload)
         return payload
     except JWTError:
         raise HTTPException(
@@ -0,0 +1,18 @@
+from functools import lru_cache
+from typing import Any
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    # Construir un TypeAdapter compila su esquema: se hace una vez por tipo
+    return TypeAdapter(tp)
+
+def json_response(tp: Any, value: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Encode `value`, already a validated model, straight to JSON bytes with the `tp`
+    serializer, skipping FastAPI's second validation against the route's
+    `response_model` (which is still declared for the OpenAPI schema).
+    """
+    return Response(content=type_adapter(tp).dump_json(value), status_code=status_code, media_type="application/json")
@@ -1,22 +1,49 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import asyncio
+from contextlib import asynccontextmanager
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 from app.core.config import settings
-from typing import Generator
+from common_db.engine import create_db_engine
+from typing import AsyncGenerator, AsyncIterator
 
-DATABASE_URL = (f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
-                f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
+DATABASE_URL = settings.DATABASE_URL or (f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
+                                         f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_db_engine(DATABASE_URL, settings)
 
 class Base(DeclarativeBase):
     pass
 
 SessionLocal = sessionmaker(bind=engine)
 
+# Como mucho una sesión por conexión del pool: las consultas son síncronas y corren en el event loop,
+# así que esperar una conexión dentro del pool lo bloquearía, y con él a las peticiones que la iban a liberar
+_session_slots = asyncio.Semaphore(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
 
-def get_db() -> Generator:
+
+async def get_db() -> AsyncGenerator:
+    await _session_slots.acquire()
     db = SessionLocal()
+    db.info["holds_slot"] = True
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+        if db.info["holds_slot"]:
+            _session_slots.release()
+
+@asynccontextmanager
+async def connection_released(db: Session) -> AsyncIterator[None]:
+    """
+    Return the connection of `db` to the pool, and its slot to other requests, while
+    awaiting something slow that needs no database (bcrypt). The loaded objects are
+    expired, so read what is needed from them before entering.
+    """
+    db.rollback()
+    _session_slots.release()
+    db.info["holds_slot"] = False
+    try:
+        yield
+    finally:
+        # Si se cancela aquí, get_db no devuelve un hueco que no tiene
+        await _session_slots.acquire()
+        db.info["holds_slot"] = True
\ No newline at end of file
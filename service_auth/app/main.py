@@ -1,8 +1,10 @@
 from fastapi import FastAPI
-from app.routes import auth, user
+from app.routes import auth, user, hashing, keys, pool, metrics
 from app.db.database import engine, Base
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.metrics import metrics as request_metrics
+from common_db.metrics import MetricsMiddleware
 
 app = FastAPI(
     title="Auth API",
@@ -17,5 +19,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 app.include_router(auth.router)
-app.include_router(user.router)
\ No newline at end of file
+app.include_router(user.router)
+app.include_router(hashing.router)
+app.include_router(keys.router)
+app.include_router(pool.router)
+app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,8 @@
+from fastapi import APIRouter, status
+from app.core.security import get_hashing_stats
+
+router = APIRouter(prefix="/hashing", tags=["Hashing"])
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_stats():
+    return get_hashing_stats()
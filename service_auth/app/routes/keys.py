@@ -0,0 +1,13 @@
+from fastapi import APIRouter, status
+from app.core.security import get_jwks
+
+router = APIRouter(tags=["Keys"])
+
+@router.get("/.well-known/jwks.json", status_code=status.HTTP_200_OK)
+async def jwks():
+    """
+    Public keys used to sign access tokens, in JWKS format.
+
+    Only populated when `ALGORITHM` is asymmetric (e.g. `RS256`); other services use it to verify tokens locally.
+    """
+    return get_jwks()
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app.core.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition format."""
+    return metrics.response()
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, status
+from app.db.database import engine
+from common_db.engine import get_pool_stats
+
+router = APIRouter(prefix="/pool", tags=["Pool"])
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_stats():
+    return get_pool_stats(engine)
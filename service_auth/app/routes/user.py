@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.schema.user import UserOut, UserUpdate
 from app.core.security import get_current_user
+from app.core.serialization import json_response
 from app.services.user_service import get_user_by_id, update_user, deactivate_user
 
 
@@ -38,7 +39,7 @@ async def get_my_user(current_user_id: int = Depends(get_current_user), db: Sess
     - `is_active`: Indicates if the account is active (true/false).
     - `created_at`: Date and time when the account was created.
     """
-    return await get_user_by_id(current_user_id, db)
+    return json_response(UserOut, await get_user_by_id(current_user_id, db))
 
 @router.put("/update", response_model=UserOut, status_code=status.HTTP_200_OK)
 async def update_my_user(
@@ -1,34 +1,56 @@
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.core.security import get_user_token
 from app.models.models import User
 from app.schema.auth import Token, UserSignup
 from app.schema.user import UserOut
-from app.core.security import get_password_hash, get_token_payload, verify_password
+from app.core.security import get_password_hash, get_token_payload, verify_and_update_password
+from app.db.database import connection_released
 
 async def signup(user: UserSignup, db: Session) -> UserOut:
     existing_user = db.query(User).filter(User.email == user.email).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered",)
-    
-    hashed_password = get_password_hash(user.password)
+
+    # Como en signin, bcrypt no retiene la conexión
+    async with connection_released(db):
+        hashed_password = await get_password_hash(user.password)
     new_user = User(
         name=user.name,
         email=user.email,
         hashed_password=hashed_password,
     )
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Otro registro con el mismo email se adelantó mientras se calculaba el hash
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     db.refresh(new_user)
     return UserOut.model_validate(new_user)
 
 async def signin(user_credentials: OAuth2PasswordRequestForm, db: Session) -> Token:
     user = db.query(User).filter(User.email == user_credentials.username).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    return await get_user_token(id=user.id)
+
+    # Se devuelve la conexión al pool antes de esperar a bcrypt: con más inicios de sesión simultáneos
+    # que conexiones, el siguiente checkout (síncrono) bloquearía el event loop y nadie la liberaría
+    user_id, hashed_password = user.id, user.hashed_password
+    async with connection_released(db):
+        is_valid, new_hash = await verify_and_update_password(user_credentials.password, hashed_password)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Rehash transparente cuando cambia el coste configurado
+    if new_hash:
+        db.query(User).filter(User.id == user_id).update({User.hashed_password: new_hash})
+        db.commit()
+
+    return await get_user_token(id=user_id)
 
 async def get_refresh_token(token: str, db: Session) -> Token:
     payload = await get_token_payload(token)
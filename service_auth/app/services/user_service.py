@@ -3,6 +3,7 @@ from fastapi import HTTPException
 from app.models.models import User
 from app.schema.user import UserOut, UserUpdate
 from app.core.security import get_password_hash
+from app.db.database import connection_released
 
 async def get_user_by_id(user_id: int, db: Session) -> UserOut:
     user = db.query(User).filter(User.id == user_id).first()
@@ -11,15 +12,18 @@ async def get_user_by_id(user_id: int, db: Session) -> UserOut:
     return UserOut.model_validate(user)
 
 async def update_user(user_id: int, user_data: UserUpdate, db: Session) -> UserOut:
+    changes = user_data.model_dump(exclude_unset=True)
+    # El hash se calcula antes de leer el usuario, sin retener la conexión ni su hueco durante bcrypt
+    if "password" in changes:
+        async with connection_released(db):
+            changes["hashed_password"] = await get_password_hash(changes.pop("password"))
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    for key, value in user_data.model_dump(exclude_unset=True).items():
-        if key == "password":
-            setattr(user, "hashed_password", get_password_hash(value))
-        else:
-            setattr(user, key, value)
+
+    for key, value in changes.items():
+        setattr(user, key, value)
 
     db.commit()
     db.refresh(user)
@@ -0,0 +1,154 @@
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any
+from app.core.config import settings
+
+
+class MemoryCache:
+    """
+    In-process cache with a TTL per entry and LRU eviction once `max_entries` is reached.
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def set_many(self, values: dict[str, Any], ttl: int | None = None) -> None:
+        for key, value in values.items():
+            await self.set(key, value, ttl)
+
+    async def add(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        """Set `key` only if it is absent (or expired); return whether it was set."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] >= time.monotonic():
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class RedisCache:
+    """
+    Cache shared between workers on any Redis-protocol server. Values are pickled.
+
+    `client` may be any object with the `redis.asyncio.Redis` interface (e.g. a fake for local runs).
+    """
+
+    def __init__(self, ttl: int, url: str | None = None, client: Any = None):
+        if client is None:
+            try:
+                from redis.asyncio import Redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+            client = Redis.from_url(url)
+        self.ttl = ttl
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(raw)
+
+    async def get_many(self, keys: list[str]) -> list[Any | None]:
+        # Un solo MGET en vez de un viaje de ida y vuelta por clave
+        raws = await self.client.mget(keys) if keys else []
+        found = sum(raw is not None for raw in raws)
+        self.hits += found
+        self.misses += len(raws) - found
+        return [None if raw is None else pickle.loads(raw) for raw in raws]
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        await self.client.set(key, pickle.dumps(value), ex=ttl or self.ttl)
+
+    async def set_many(self, values: dict[str, Any], ttl: int | None = None) -> None:
+        # MSET no admite TTL: un pipeline sin transacción envía todos los SET juntos
+        if not values:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, pickle.dumps(value), ex=ttl or self.ttl)
+            await pipe.execute()
+
+    async def add(self, key: str, value: Any, ttl: int | None = None) -> bool:
+        return bool(await self.client.set(key, pickle.dumps(value), ex=ttl or self.ttl, nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{prefix}*")]
+        await self.delete(*keys)
+
+    def stats(self) -> dict:
+        # Las expulsiones las gestiona el servidor Redis (ver `INFO stats`)
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "evictions": None}
+
+
+def build_cache(ttl: int = settings.CACHE_TTL_SECONDS, max_entries: int = settings.CACHE_MAX_ENTRIES) -> MemoryCache | RedisCache:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(ttl, url=settings.CACHE_REDIS_URL)
+    return MemoryCache(ttl, max_entries)
+
+
+cache = build_cache()
+
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def category_products_key(category_id: int | None) -> str:
+    return f"products:category:{category_id}"
+
+CATEGORIES_PREFIX = "categories:"
+
+def categories_page_key(limit: int, cursor: int | None) -> str:
+    return f"{CATEGORIES_PREFIX}{limit}:{cursor}"
@@ -11,6 +11,71 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_PORT: int
 
+    # Pool de conexiones (ajustar según max_connections de MySQL y el número de réplicas)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+
+    # Se registra un aviso de posible N+1 si una petición ejecuta más consultas que este umbral
+    METRICS_N_PLUS_ONE_THRESHOLD: int = 20
+
+    # URL completa opcional (p. ej. "sqlite+aiosqlite:///./test.db"); si se define, reemplaza a DB_*
+    DATABASE_URL: str | None = None
+
+    # Réplicas de lectura opcionales, en JSON (p. ej. '["mysql+aiomysql://u:p@replica1:3306/db"]');
+    # las réplicas con más retraso que DB_REPLICA_MAX_LAG_SECONDS se omiten hasta la siguiente comprobación
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5
+
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+    # Ids por petición en /products/batch (la variante POST es para listas que no caben en la URL)
+    PRODUCT_BATCH_MAX_IDS: int = 1000
+
+    # Filas por lote en la importación/exportación masiva y en las respuestas en streaming
+    BULK_CHUNK_SIZE: int = 1000
+
+    # Caché de lecturas del catálogo: "memory" (por defecto) o "redis"
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_REDIS_URL: str | None = None
+
+    # Instantánea de precio/IVA/estado para POST /orders/quote: se refresca como mucho cada
+    # PRICE_SNAPSHOT_REFRESH_SECONDS con los productos modificados desde el último refresco, releyendo
+    # PRICE_SNAPSHOT_OVERLAP_SECONDS de margen por las transacciones que confirman después de fijar updated_at
+    PRICE_SNAPSHOT_REFRESH_SECONDS: float = 1
+    PRICE_SNAPSHOT_OVERLAP_SECONDS: float = 5
+    # Igual para el índice invertido de búsqueda (solo fuera de MySQL): así recoge lo escrito por otros workers
+    SEARCH_INDEX_REFRESH_SECONDS: float = 1
+    SEARCH_INDEX_OVERLAP_SECONDS: float = 5
+
+    # Escritura agrupada (group commit) de POST /orders/: los pedidos ya validados y con precio se guardan
+    # juntos, hasta ORDER_BATCH_MAX_ORDERS por transacción y esperando como mucho ORDER_BATCH_MAX_DELAY_MS
+    # a que se llene el lote. Cada worker agrupa solo sus propios pedidos
+    ORDER_GROUP_COMMIT: bool = False
+    ORDER_BATCH_MAX_ORDERS: int = 100
+    ORDER_BATCH_MAX_DELAY_MS: float = 5
+
+    # Respuestas guardadas por Idempotency-Key (en el backend de CACHE_BACKEND; usar "redis" con varios workers).
+    # IDEMPOTENCY_LOCK_SECONDS limita lo que un reintento espera a la petición original en curso
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+
+    # Verificación local de los tokens emitidos por service_auth (p. ej. "http://localhost:8000/.well-known/jwks.json")
+    AUTH_JWKS_URL: str | None = None
+    AUTH_ALGORITHM: str = "RS256"
+    # Un kid desconocido provoca como mucho una descarga del JWKS cada AUTH_JWKS_MIN_REFRESH_SECONDS;
+    # si tampoco está en el JWKS recién descargado se rechaza sin descargar durante AUTH_JWKS_UNKNOWN_KID_TTL_SECONDS
+    AUTH_JWKS_MIN_REFRESH_SECONDS: float = 30
+    AUTH_JWKS_UNKNOWN_KID_TTL_SECONDS: float = 300
+    TOKEN_CACHE_SIZE: int = 10000
+
     FRONTEND_URL: str
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
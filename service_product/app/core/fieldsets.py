@@ -0,0 +1,48 @@
+from functools import lru_cache
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import Select, select
+
+# Siempre se devuelve: es la clave de la paginación por cursor y de la identidad de cada fila
+ALWAYS_INCLUDED = ("id",)
+FIELDS_DESCRIPTION = "Comma-separated fields to return (e.g. `id,name,price`); `id` is always included."
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> tuple[str, ...] | None:
+    """
+    Parse a `fields=id,name,price` query parameter against `schema`. Returns the
+    selected field names in schema order (plus `id`), or None for every field.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(schema.model_fields)}."
+        )
+    # En el orden del esquema, para que la forma de la respuesta no dependa de la consulta
+    requested.update(ALWAYS_INCLUDED)
+    return tuple(name for name in schema.model_fields if name in requested)
+
+@lru_cache(maxsize=None)
+def sparse_model(schema: type[BaseModel], fields: tuple[str, ...] | None) -> type[BaseModel]:
+    """`schema` restricted to `fields` (built once per combination), or `schema` itself for None."""
+    if fields is None:
+        return schema
+    return create_model(
+        f"{schema.__name__}[{','.join(fields)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (field.annotation, field) for name, field in schema.model_fields.items() if name in fields},
+    )
+
+def fieldset_columns(model, fields: tuple[str, ...]) -> list:
+    return [getattr(model, name) for name in fields]
+
+def select_fields(model, fields: tuple[str, ...] | None) -> Select:
+    """
+    Core select of the `fields` columns of `model` (every column for None): listings
+    need neither identity map nor change tracking, and skipped columns are never read.
+    """
+    return select(model.__table__) if fields is None else select(*fieldset_columns(model, fields))
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class GroupCommitter(Generic[T]):
+    """
+    Collect the items submitted by concurrent requests and write them in batches:
+    a batch closes with `max_items` items or `max_delay` seconds after its first
+    item, whichever comes first, and `flush` saves it in one transaction.
+
+    `flush(items)` returns one entry per item, in order: the value for that caller
+    or the exception to raise in it. If `flush` itself raises, every caller of the
+    batch gets that exception. A caller that gives up waiting does not cancel its
+    item, which is still written with the batch. If the batching task itself stops
+    (e.g. cancelled), its pending callers get a RuntimeError instead of waiting forever.
+    """
+
+    def __init__(self, flush: Callable[[list[T]], Awaitable[list[Any]]], max_items: int, max_delay: float):
+        self._flush = flush
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self) -> None:
+        # La cola y la tarea pertenecen al event loop en curso (uno nuevo en cada asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # Contexto vacío: si no, la tarea heredaría el de la petición que la arranca (p. ej. sus métricas
+            # de consultas) y todo lo que hicieran los lotes se le atribuiría a ella
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, item: T) -> Any:
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        # Llena `batch` en sitio para que _run vea lo ya sacado de la cola aunque lo cancelen a mitad
+        batch.append(await self._queue.get())
+        deadline = self._loop.time() + self.max_delay
+        while len(batch) < self.max_items:
+            if self._queue.empty():
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+
+    async def _run(self) -> None:
+        batch: list[tuple[T, asyncio.Future]] = []
+        try:
+            while True:
+                batch = []
+                await self._collect(batch)
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                try:
+                    results = await self._flush([item for item, _ in batch])
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (_, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                _abandon(batch)
+        finally:
+            # Cancelada o caída por un BaseException: ni el lote en curso ni lo que quede en la cola se
+            # guardará, y sus llamantes no pueden quedarse esperando (la siguiente llamada arranca otra tarea)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            _abandon(batch)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+def _abandon(batch: list[tuple[Any, asyncio.Future]]) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(RuntimeError("The group commit stopped before resolving this item"))
@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Iterable
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+
+def content_etag(schema: type[BaseModel], items: Iterable[Any], *extra: Any) -> str:
+    """
+    Weak ETag of the `schema` fields of `items` (plus `extra`, e.g. the next cursor):
+    the values that the response would serialize, hashed without serializing it.
+    """
+    # Cambia con cualquier valor visible, aunque ocurra en el mismo segundo que el anterior
+    fields = tuple(schema.model_fields)
+    digest = hashlib.sha1(repr((fields, extra)).encode())
+    for item in items:
+        digest.update(repr(tuple(getattr(item, field, None) for field in fields)).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+def _as_utc(value: datetime) -> datetime:
+    # Las columnas DateTime se guardan sin zona horaria, en UTC
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """
+    Evaluate `If-None-Match` (which takes precedence, RFC 9110) or else `If-Modified-Since`.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = _settled(last_modified)
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified) <= _as_utc(since)
+
+    return False
+
+def _settled(last_modified: datetime | None) -> datetime | None:
+    # updated_at tiene resolución de segundos: mientras su segundo no haya terminado el recurso aún puede
+    # cambiar sin que cambie la fecha, así que Last-Modified solo se envía (y se compara) cuando ya pasó
+    if last_modified is None or _as_utc(last_modified) >= datetime.now(timezone.utc).replace(microsecond=0):
+        return None
+    return last_modified
+
+def set_validators(response: Response, etag: str, last_modified: datetime | None) -> None:
+    response.headers["ETag"] = etag
+    last_modified = _settled(last_modified)
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+
+def not_modified_response(etag: str, last_modified: datetime | None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+def conditional_response(request: Request, etag: str, last_modified: datetime | None, build: Callable[[], Response]) -> Response:
+    """
+    Return a bare 304 if the request's validators still match, or else `build()` the
+    response and attach the ETag and Last-Modified to it: the body is only serialized
+    when it is going to be sent.
+    """
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    response = build()
+    set_validators(response, etag, last_modified)
+    return response
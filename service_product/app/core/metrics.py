@@ -0,0 +1,8 @@
+from app.core.config import settings
+from app.db.database import engine, replicas
+from common_db.metrics import Metrics
+
+metrics = Metrics(settings.METRICS_N_PLUS_ONE_THRESHOLD)
+metrics.instrument_engine(engine)
+for replica in replicas.replicas:
+    metrics.instrument_engine(replica.engine)
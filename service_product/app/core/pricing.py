@@ -0,0 +1,13 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+
+
+def price_line(quantity: int, price: Decimal, iva: Decimal) -> tuple[Decimal, Decimal]:
+    """(subtotal, iva_amount) of an order line; the IVA is kept unrounded, as stored."""
+    subtotal = quantity * price
+    return subtotal, subtotal * iva
+
+def order_total(subtotal: Decimal, iva_total: Decimal) -> Decimal:
+    # Redondeo comercial a 2 decimales, el mismo que aplica MySQL al guardar en DECIMAL(12,2)
+    return (subtotal + iva_total).quantize(CENT, rounding=ROUND_HALF_UP)
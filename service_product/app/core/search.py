@@ -0,0 +1,146 @@
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Iterable
+
+NAME_WEIGHT = 3
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lowercase word tokens without accents (as MySQL's accent-insensitive collations compare them)."""
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return _TOKEN_RE.findall("".join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+class InvertedIndex:
+    """
+    In-process full-text index over product name and description, used when the
+    database has no FULLTEXT support (SQLite for local runs and tests).
+
+    Every query term matches as a prefix and all terms must match. Documents are
+    ranked by tf-idf, with name matches weighted NAME_WEIGHT times a description match.
+    The index lives in each worker, is loaded from the database on first use and is
+    updated incrementally: at once with the writes of this worker (product service), and
+    with those of other workers by rereading the rows whose `updated_at` is not older
+    than `watermark`, as the price snapshot does.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loading = False
+        # Mayor updated_at leído de la BD (hora de la BD, no la del proceso)
+        self.watermark: datetime | None = None
+        self.refreshed_at = 0.0
+        # id -> updated_at de las filas ya aplicadas dentro del margen que relee cada refresco,
+        # para no volver a tokenizarlas mientras no cambien
+        self.recent: dict[int, datetime] = {}
+        # token -> {product_id: peso}
+        self._postings: dict[str, dict[int, int]] = {}
+        # Vocabulario ordenado para expandir prefijos con bisect
+        self._vocabulary: list[str] = []
+        self._documents: dict[int, tuple[tuple[str, ...], str]] = {}
+        # Cambios recibidos mientras se carga el índice, aplicados al terminar
+        self._pending: dict[int, tuple[str | None, str | None, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _clear(self) -> None:
+        self._postings, self._vocabulary, self._documents = {}, [], {}
+
+    def begin_load(self) -> None:
+        self._clear()
+        self.loaded, self.loading, self.watermark, self.recent = False, True, None, {}
+
+    def load_rows(self, rows: Iterable[tuple[int, str | None, str | None, str, datetime]]) -> None:
+        # En la carga completa el vocabulario se ordena una sola vez, en finish_load
+        for product_id, name, description, status, updated_at in rows:
+            self._add(product_id, name, description, status, sort=not self.loading)
+            if self.watermark is None or updated_at > self.watermark:
+                self.watermark = updated_at
+
+    def abort_load(self) -> None:
+        self._clear()
+        self._pending.clear()
+        self.loading = False
+
+    def finish_load(self) -> None:
+        self._vocabulary.sort()
+        for product_id, (name, description, status) in self._pending.items():
+            self._add(product_id, name, description, status)
+        self._pending.clear()
+        self.loaded, self.loading = True, False
+
+    def upsert(self, product_id: int, name: str | None, description: str | None, status: str) -> None:
+        if self.loading:
+            self._pending[product_id] = (name, description, status)
+        elif self.loaded:
+            self._add(product_id, name, description, status)
+
+    def _add(self, product_id: int, name: str | None, description: str | None, status: str, sort: bool = True) -> None:
+        self._remove(product_id)
+        weights = Counter(tokenize(description))
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        self._documents[product_id] = (tuple(weights), status)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if sort:
+                    bisect.insort(self._vocabulary, token)
+                else:
+                    self._vocabulary.append(token)
+            postings[product_id] = weight
+
+    def _remove(self, product_id: int) -> None:
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        for token in document[0]:
+            postings = self._postings[token]
+            del postings[product_id]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def _expand(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\uffff", lo=start)
+        return self._vocabulary[start:end]
+
+    def search(self, terms: list[str], limit: int, status: str | None = None) -> list[int]:
+        """The first `limit` product ids matching every term, best first (ties by id)."""
+        if not terms:
+            return []
+        total = len(self._documents)
+        scores: dict[int, float] | None = None
+        for term in dict.fromkeys(terms):
+            term_scores: dict[int, float] = {}
+            for token in self._expand(term):
+                postings = self._postings[token]
+                idf = math.log(1 + total / len(postings))
+                for product_id, weight in postings.items():
+                    score = idf * (1 + math.log(weight))
+                    if score > term_scores.get(product_id, 0.0):
+                        term_scores[product_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {product_id: score + term_scores[product_id] for product_id, score in scores.items() if product_id in term_scores}
+            if not scores:
+                return []
+
+        if status is not None:
+            scores = {product_id: score for product_id, score in scores.items() if self._documents[product_id][1] == status}
+        return heapq.nsmallest(limit, scores, key=lambda product_id: (-scores[product_id], product_id))
+
+
+search_index = InvertedIndex()
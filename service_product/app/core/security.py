@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import json
+import time
+import urllib.request
+from collections import OrderedDict
+from jose import JWTError, jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
+
+security = HTTPBearer()
+
+_jwks: dict | None = None
+# Último intento de descarga (también los fallidos): limita las descargas a una por AUTH_JWKS_MIN_REFRESH_SECONDS
+_jwks_fetched_at = float("-inf")
+_jwks_lock = asyncio.Lock()
+# kid -> instante (monotonic) hasta el que se rechaza sin volver a descargar el JWKS
+_unknown_kids: dict[str, float] = {}
+_MAX_UNKNOWN_KIDS = 1024
+_token_cache: OrderedDict[str, dict] = OrderedDict()
+
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _fetch_jwks() -> dict:
+    with urllib.request.urlopen(settings.AUTH_JWKS_URL, timeout=5) as response:
+        return json.load(response)
+
+def _has_key(jwks: dict | None, kid: str | None) -> bool:
+    return jwks is not None and (not kid or kid in {key.get("kid") for key in jwks.get("keys", [])})
+
+def _remember_unknown_kid(kid: str) -> None:
+    now = time.monotonic()
+    for expired in [known for known, until in _unknown_kids.items() if until <= now]:
+        del _unknown_kids[expired]
+    if len(_unknown_kids) < _MAX_UNKNOWN_KIDS:
+        _unknown_kids[kid] = now + settings.AUTH_JWKS_UNKNOWN_KID_TTL_SECONDS
+
+async def _get_jwks(kid: str | None) -> dict:
+    """
+    The JWKS of service_auth, downloaded again only when a token names an unknown `kid`
+    (key rotation). Downloads are serialized and at most one per AUTH_JWKS_MIN_REFRESH_SECONDS,
+    so arbitrary `kid`s cannot force outgoing requests: a `kid` still missing after a fresh
+    download is rejected (401) without another one for AUTH_JWKS_UNKNOWN_KID_TTL_SECONDS.
+    Raises 503 if there is no key set because the download fails or is not configured.
+    """
+    global _jwks, _jwks_fetched_at
+    if _has_key(_jwks, kid):
+        return _jwks
+    if kid in _unknown_kids and _unknown_kids[kid] > time.monotonic():
+        raise _invalid_credentials()
+    if not settings.AUTH_JWKS_URL:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="AUTH_JWKS_URL is not configured")
+
+    async with _jwks_lock:
+        # Otra petición puede haberlo descargado mientras esta esperaba
+        if _has_key(_jwks, kid):
+            return _jwks
+        refetched = time.monotonic() - _jwks_fetched_at >= settings.AUTH_JWKS_MIN_REFRESH_SECONDS
+        if refetched:
+            _jwks_fetched_at = time.monotonic()
+            try:
+                _jwks = await asyncio.to_thread(_fetch_jwks)
+            except (OSError, ValueError):
+                # URLError y los timeouts son OSError; un cuerpo que no es JSON, ValueError
+                if _jwks is None:
+                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Authentication keys are unavailable")
+                refetched = False
+        if _jwks is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Authentication keys are unavailable")
+        if not _has_key(_jwks, kid):
+            # Solo se recuerda si el JWKS recién descargado tampoco lo tiene; durante la espera mínima
+            # entre descargas un kid nuevo legítimo se rechaza, pero se vuelve a comprobar después
+            if refetched:
+                _remember_unknown_kid(kid)
+            raise _invalid_credentials()
+        return _jwks
+
+async def get_token_payload(token: str) -> dict:
+    token_digest = hashlib.sha256(token.encode()).hexdigest()
+    payload = _token_cache.get(token_digest)
+    if payload is not None and payload["exp"] > time.time():
+        _token_cache.move_to_end(token_digest)
+        return payload
+
+    try:
+        jwks = await _get_jwks(jwt.get_unverified_header(token).get("kid"))
+        payload = jwt.decode(token, jwks, algorithms=[settings.AUTH_ALGORITHM])
+    except JWTError:
+        raise _invalid_credentials()
+
+    if "exp" in payload:
+        _token_cache[token_digest] = payload
+        while len(_token_cache) > settings.TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+# Aún no protege ninguna ruta de productos: está disponible para las que requieran usuario
+async def get_current_user(token: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    payload = await get_token_payload(token.credentials)
+    user_id = payload.get("id")
+
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: Id not found",
+        )
+
+    return user_id
@@ -0,0 +1,27 @@
+from functools import lru_cache
+from typing import Any, Iterable
+from fastapi import Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    # Construir un TypeAdapter compila su esquema: se hace una vez por tipo
+    return TypeAdapter(tp)
+
+def validate_many(schema: type[BaseModel], rows: Iterable[Any]) -> list:
+    """
+    Convert ORM objects, Core rows or mappings to `schema` instances in a single
+    batched validation call (instances of `schema` pass through unchanged).
+    """
+    return type_adapter(list[schema]).validate_python(rows, from_attributes=True)
+
+def json_response(tp: Any, value: Any, status_code: int = status.HTTP_200_OK, exclude_unset: bool = False) -> Response:
+    """
+    Encode `value`, already made of validated models, straight to JSON bytes with
+    the `tp` serializer. Returning a Response skips FastAPI's second validation
+    against the route's `response_model` and its generic `jsonable_encoder` pass;
+    `response_model` is still declared on the route for the OpenAPI schema.
+    """
+    body = type_adapter(tp).dump_json(value, exclude_unset=exclude_unset)
+    return Response(content=body, status_code=status_code, media_type="application/json")
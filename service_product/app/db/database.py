@@ -1,22 +1,36 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
-from typing import Generator
+from app.db.replicas import ReplicaRouter
+from common_db.engine import create_async_db_engine
+from typing import AsyncGenerator
 
-DATABASE_URL = (f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
-                f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
+DATABASE_URL = settings.DATABASE_URL or (f"mysql+aiomysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
+                                         f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
 
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_async_db_engine(DATABASE_URL, settings)
 
 class Base(DeclarativeBase):
     pass
 
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
+replicas = ReplicaRouter(
+    SessionLocal,
+    [create_async_db_engine(url, settings) for url in settings.DB_REPLICA_URLS],
+    settings.DB_REPLICA_MAX_LAG_SECONDS,
+    settings.DB_REPLICA_LAG_CHECK_SECONDS,
+)
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
+        yield db
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session on a read replica (primary if none is usable), for read-only routes that
+    tolerate replication lag. Mutations and read-after-write paths use `get_db`.
+    """
+    async with replicas.session() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,41 @@
+from typing import Any, Callable
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from pydantic import BaseModel
+from app.core.serialization import validate_many
+from app.schemas.pagination import Page
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    key: InstrumentedAttribute,
+    schema: type[BaseModel],
+    limit: int,
+    cursor: int | None = None,
+    serialize: Callable[[Any], BaseModel] | None = None,
+) -> Page:
+    """
+    Keyset pagination over a monotonically increasing column (normally the id).
+
+    Rows after `cursor` are fetched in `key` order, reading one extra row to know
+    whether there is a next page, so the cost does not grow with the offset.
+    `stmt` may select an ORM entity (`select(Product)`) or plain columns
+    (`select(Product.__table__)`), whose Core rows are cheaper to build. Rows are
+    converted with `serialize` if given, else in one batch with `validate_many`.
+    """
+    if cursor is not None:
+        stmt = stmt.where(key > cursor)
+
+    result = await db.execute(stmt.order_by(key).limit(limit + 1))
+    rows = (result.scalars() if selects_entity(stmt) else result).all()
+    next_cursor = getattr(rows[limit - 1], key.key) if len(rows) > limit else None
+
+    items = [serialize(row) for row in rows[:limit]] if serialize else validate_many(schema, rows[:limit])
+    return Page(items=items, next_cursor=next_cursor)
+
+def selects_entity(stmt: Select) -> bool:
+    # True para `select(Product)`; False para columnas sueltas o `select(Product.__table__)`
+    columns = stmt.column_descriptions
+    return len(columns) == 1 and columns[0].get("entity") is not None and columns[0]["expr"] is columns[0]["entity"]
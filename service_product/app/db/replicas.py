@@ -0,0 +1,121 @@
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from common_db.engine import get_pool_stats
+
+logger = logging.getLogger("replicas")
+
+
+async def get_replication_lag(engine: AsyncEngine) -> float | None:
+    """
+    Seconds the replica is behind its source, or None if replication is stopped.
+
+    Servers that are not configured as replicas (e.g. SQLite or standalone MySQL
+    stand-ins for local runs) report no lag once they answer a trivial query.
+    """
+    async with engine.connect() as conn:
+        if conn.dialect.name != "mysql":
+            await conn.exec_driver_sql("SELECT 1")
+            return 0.0
+        try:
+            result = await conn.exec_driver_sql("SHOW REPLICA STATUS")
+        except DBAPIError:
+            # MySQL < 8.0.22
+            result = await conn.exec_driver_sql("SHOW SLAVE STATUS")
+        row = result.mappings().first()
+        if row is None:
+            return 0.0
+        lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        return None if lag is None else float(lag)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self.lag: float | None = None
+        self.checked_at = float("-inf")
+        self.error: str | None = None
+        self.sessions = 0
+
+    def mark_down(self, error: Exception) -> None:
+        # Se descarta hasta la siguiente comprobación de retraso
+        self.lag = None
+        self.error = str(error)
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the read replicas, skipping the ones whose replication lag
+    exceeds `max_lag` seconds or that are unreachable. Falls back to the primary
+    when none is usable (or none is configured).
+
+    Lag is refreshed lazily, at most once every `check_interval` seconds per replica.
+    """
+
+    def __init__(self, primary: async_sessionmaker, engines: list[AsyncEngine], max_lag: float, check_interval: float):
+        self.primary = primary
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.primary_fallbacks = 0
+        self._order = itertools.cycle(self.replicas)
+
+    async def _refresh(self, replica: Replica) -> None:
+        # Se marca antes de consultar para que las peticiones concurrentes no repitan la comprobación
+        replica.checked_at = time.monotonic()
+        try:
+            replica.lag = await get_replication_lag(replica.engine)
+            replica.error = None if replica.lag is not None else "Replication is stopped"
+        except Exception as e:
+            replica.mark_down(e)
+        if replica.error:
+            logger.warning("Replica %s unavailable: %s", replica.engine.url.render_as_string(), replica.error)
+
+    async def pick(self) -> Replica | None:
+        for _ in range(len(self.replicas)):
+            replica = next(self._order)
+            if time.monotonic() - replica.checked_at >= self.check_interval:
+                await self._refresh(replica)
+            if replica.lag is not None and replica.lag <= self.max_lag:
+                return replica
+        if self.replicas:
+            self.primary_fallbacks += 1
+        return None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        replica = await self.pick()
+        if replica is None:
+            async with self.primary() as db:
+                yield db
+            return
+
+        replica.sessions += 1
+        async with replica.sessionmaker() as db:
+            try:
+                yield db
+            except OperationalError as e:
+                # Réplica caída o desconectada: las siguientes lecturas van a otra réplica o al primario
+                replica.mark_down(e)
+                raise
+
+    def stats(self) -> dict:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(),
+                    "lag_seconds": replica.lag,
+                    "error": replica.error,
+                    "sessions": replica.sessions,
+                    "pool": get_pool_stats(replica.engine),
+                }
+                for replica in self.replicas
+            ],
+        }
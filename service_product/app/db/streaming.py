@@ -0,0 +1,45 @@
+from typing import AsyncIterator
+from sqlalchemy import Select
+from pydantic import BaseModel
+from app.core.config import settings
+from app.db.database import replicas
+from app.db.pagination import selects_entity
+
+STREAM_NDJSON = "ndjson"
+STREAM_JSON = "json"
+STREAM_MEDIA_TYPES = {STREAM_NDJSON: "application/x-ndjson", STREAM_JSON: "application/json"}
+STREAM_PATTERN = f"^({STREAM_NDJSON}|{STREAM_JSON})$"
+
+
+async def stream_models(stmt: Select, schema: type[BaseModel], stream_format: str) -> AsyncIterator[str]:
+    """
+    Serialize the rows of `stmt` as NDJSON lines or as a chunked JSON array.
+
+    Rows (ORM entities or Core rows) are read through a server-side cursor in batches
+    of BULK_CHUNK_SIZE and entities are expunged once written, so memory stays
+    constant regardless of the result size.
+    The session is opened here because the one from get_db is closed before the
+    response body is sent.
+    """
+    separator = "\n" if stream_format == STREAM_NDJSON else ","
+    first = True
+    entities = selects_entity(stmt)
+
+    async with replicas.session() as db:
+        result = await db.stream(stmt.execution_options(yield_per=settings.BULK_CHUNK_SIZE))
+        if entities:
+            result = result.scalars()
+        if stream_format == STREAM_JSON:
+            yield "["
+        async for rows in result.partitions():
+            chunk = separator.join(schema.model_validate(row).model_dump_json() for row in rows)
+            if stream_format == STREAM_NDJSON:
+                yield chunk + "\n"
+            else:
+                yield chunk if first else separator + chunk
+            first = False
+            if entities:
+                for row in rows:
+                    db.expunge(row)
+        if stream_format == STREAM_JSON:
+            yield "]"
@@ -0,0 +1,28 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def upsert_increment(db: AsyncSession, table: Table, key_columns: list[str], rows: list[dict]) -> None:
+    """
+    Insert `rows` into `table`, or add their values to the existing rows with the same key.
+
+    Runs as a single multi-row `INSERT ... ON DUPLICATE KEY UPDATE` (MySQL) or
+    `INSERT ... ON CONFLICT DO UPDATE` (SQLite). Rows are locked in the order given,
+    so callers should pass them sorted by key to avoid deadlocks.
+    """
+    if not rows:
+        return
+    value_columns = [column for column in rows[0] if column not in key_columns]
+
+    if db.bind.dialect.name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in value_columns})
+    else:
+        stmt = sqlite_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: table.c[column] + stmt.excluded[column] for column in value_columns},
+        )
+    await db.execute(stmt)
@@ -1,8 +1,10 @@
 from fastapi import FastAPI
-from app.routes import product, category, order
+from app.routes import product, category, order, analytics, cache, pool, metrics
 from app.db.database import engine, Base
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.metrics import metrics as request_metrics
+from common_db.metrics import MetricsMiddleware
 
 app = FastAPI(
     title="Product API",
@@ -17,6 +19,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 app.include_router(product.router)
 app.include_router(category.router)
 app.include_router(order.router)
+app.include_router(analytics.router)
+app.include_router(cache.router)
+app.include_router(pool.router)
+app.include_router(metrics.router)
@@ -1,7 +1,8 @@
-from sqlalchemy import Integer, Column, String, Boolean, DateTime, Text, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, Column, String, Boolean, Date, DateTime, Text, Numeric, ForeignKey, UniqueConstraint, Index
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm import relationship, backref, configure_mappers
 from sqlalchemy.sql.expression import text
+from sqlalchemy.sql import func
 from common_db.base import Base
 from enum import Enum
 
@@ -20,43 +21,93 @@ class OrderStatus(str, Enum):
 class Category(Base):
     __tablename__ = "categories"
 
-    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(50), nullable=False, index=True)
     products = relationship("Product", backref="category", passive_deletes=True)
 
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False, index=True)
     description = Column(Text(500))
     img_url = Column(String(255))
     price = Column(Numeric(12,2), nullable=False)
     iva = Column(Numeric(5,2), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"))
+    stock = Column(Integer)  # NULL = sin control de inventario
     status = Column(SQLEnum(ProductStatus, name="product_status"), nullable=False, default=ProductStatus.ACTIVE)
-    updated_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=False)
+    updated_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"), onupdate=func.now(), nullable=False)
     order_items = relationship("OrderItem", backref="product")
 
+    __table_args__ = (
+        # Con y sin filtro de estado: (category_id, status, id) solo da el orden por id si el estado es fijo
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_category_id_status_id", "category_id", "status", "id"),
+        Index("ix_products_status_id", "status", "id"),
+        # Refresco incremental de la instantánea de precios (app/core/price_snapshot.py)
+        Index("ix_products_updated_at", "updated_at"),
+        # Solo MySQL; en otros motores la búsqueda usa el índice invertido en memoria (app/core/search.py)
+        Index("ix_products_name_description_ft", "name", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="RESTRICT"), nullable=False)
     user = relationship("User", backref="orders")
+    # total_amount = subtotal + iva_total, redondeado a 2 decimales
+    subtotal = Column(Numeric(12,2), nullable=False)
+    iva_total = Column(Numeric(14,4), nullable=False)
     total_amount = Column(Numeric(12,2), nullable=False)
     status = Column(SQLEnum(OrderStatus, name="order_status"), nullable=False, default=OrderStatus.PENDING)
     created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=False)
     order_items = relationship("OrderItem", backref=backref("order"), cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Igualdad + id: sirven directamente el orden del keyset (ORDER BY id) sin ordenar aparte
+        Index("ix_orders_user_id_id", "user_id", "id"),
+        Index("ix_orders_status_id", "status", "id"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
-    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="RESTRICT"), nullable=False)
     quantity = Column(Integer, nullable=False)
     price_at_time_of_order = Column(Numeric(12,2), nullable=False)
     iva_at_time_of_order = Column(Numeric(5,2), nullable=False)
+    # Importes de la línea calculados al crear el pedido (el IVA se guarda sin redondear)
+    subtotal = Column(Numeric(12,2), nullable=False)
+    iva_amount = Column(Numeric(14,4), nullable=False)
+    line_total = Column(Numeric(14,4), nullable=False)
+
+    # El índice de la restricción única también cubre las búsquedas por order_id
+    __table_args__ = (UniqueConstraint('order_id', 'product_id', name='_order_product_uc'),)
+
+# Agregados diarios mantenidos por create_order/update_order (ver app/services/analytics_service.py)
+class OrderDailyStats(Base):
+    __tablename__ = "order_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(SQLEnum(OrderStatus, name="order_status"), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Numeric(14,2), nullable=False, default=0)
+    iva_amount = Column(Numeric(16,4), nullable=False, default=0)
+    total_amount = Column(Numeric(14,2), nullable=False, default=0)
+
+class ProductDailySales(Base):
+    __tablename__ = "product_daily_sales"
+
+    # Solo pedidos no cancelados
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Numeric(14,2), nullable=False, default=0)
+    iva_amount = Column(Numeric(16,4), nullable=False, default=0)
 
-    __table_args__ = (UniqueConstraint('order_id', 'product_id', name='_order_product_uc'),)
\ No newline at end of file
+# Crea ya los atributos definidos vía backref (p. ej. OrderItem.product) para poder usarlos en opciones de carga
+configure_mappers()
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from datetime import date
+from app.core.config import settings
+from app.db.database import get_read_db
+from app.schemas.analytics import DailyRevenueOut, CategoryRevenueOut, ProductRevenueOut, StatusBreakdownOut, IvaSummaryOut
+from app.services.analytics_service import *
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"]
+)
+
+# Todas las consultas leen los agregados diarios; las fechas son inclusivas y los ingresos excluyen pedidos cancelados
+
+@router.get("/revenue/daily", response_model=List[DailyRevenueOut], status_code=status.HTTP_200_OK)
+async def revenue_by_day(date_from: date | None = None, date_to: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_daily_revenue(db, date_from, date_to)
+
+@router.get("/revenue/categories", response_model=List[CategoryRevenueOut], status_code=status.HTTP_200_OK)
+async def revenue_by_category(date_from: date | None = None, date_to: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_revenue_by_category(db, date_from, date_to)
+
+@router.get("/revenue/products", response_model=List[ProductRevenueOut], status_code=status.HTTP_200_OK)
+async def revenue_by_product(date_from: date | None = None, date_to: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_revenue_by_product(db, date_from, date_to)
+
+@router.get("/products/top", response_model=List[ProductRevenueOut], status_code=status.HTTP_200_OK)
+async def top_products(
+    limit: int = Query(10, ge=1, le=settings.PAGE_SIZE_MAX),
+    by: str = Query("units", pattern=f"^({'|'.join(TOP_PRODUCTS_ORDER)})$"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_revenue_by_product(db, date_from, date_to, order_by=by, limit=limit)
+
+@router.get("/status", response_model=List[StatusBreakdownOut], status_code=status.HTTP_200_OK)
+async def status_breakdown(date_from: date | None = None, date_to: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_status_breakdown(db, date_from, date_to)
+
+@router.get("/iva", response_model=IvaSummaryOut, status_code=status.HTTP_200_OK)
+async def iva_collected(date_from: date | None = None, date_to: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_iva_summary(db, date_from, date_to)
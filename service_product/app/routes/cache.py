@@ -0,0 +1,11 @@
+from fastapi import APIRouter, status
+from app.core.cache import cache
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["Cache"]
+)
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_cache_stats():
+    return cache.stats()
@@ -1,31 +1,38 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.serialization import json_response
 from app.schemas.category import CategoryOut, CategoryInput
+from app.schemas.pagination import Page
 from app.services.category_service import *
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/categories",
     tags=["Categories"]
 )
 
-@router.get("/", response_model=List[CategoryOut], status_code=status.HTTP_200_OK)
-async def get_categories(db: Session = Depends(get_db)):
-    return await get_all_categories(db)
+# Va al primario porque rellena la caché de categorías
+@router.get("/", response_model=Page[CategoryOut], status_code=status.HTTP_200_OK)
+async def get_categories(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: int | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    return json_response(Page[CategoryOut], await get_all_categories(db, limit, cursor))
 
 @router.get("/{category_id}", response_model=CategoryOut, status_code=status.HTTP_200_OK)
-async def get_by_id(category_id: int, db: Session = Depends(get_db)):
+async def get_by_id(category_id: int, db: AsyncSession = Depends(get_read_db)):
     return await get_category_by_id(category_id, db)
 
 @router.post("/", response_model=CategoryOut, status_code=status.HTTP_201_CREATED)
-async def add_category(category_data: CategoryInput, db: Session = Depends(get_db)):
+async def add_category(category_data: CategoryInput, db: AsyncSession = Depends(get_db)):
     return await create_category(category_data, db)
 
 @router.put("/{category_id}", response_model=CategoryOut, status_code=status.HTTP_200_OK)
-async def update_category_by_id(category_id: int, category_data: CategoryInput, db: Session = Depends(get_db)):
+async def update_category_by_id(category_id: int, category_data: CategoryInput, db: AsyncSession = Depends(get_db)):
     return await update_category(category_id, category_data, db)
 
 @router.delete("/{category_id}", response_model=CategoryOut, status_code=status.HTTP_200_OK)
-async def delete_by_id(category_id: int, db: Session = Depends(get_db)):
+async def delete_by_id(category_id: int, db: AsyncSession = Depends(get_db)):
     return await delete_category(category_id, db)
\ No newline at end of file
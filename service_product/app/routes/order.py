@@ -1,42 +1,122 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime
+from app.core.config import settings
+from app.core.fieldsets import FIELDS_DESCRIPTION, parse_fields, sparse_model
+from app.core.serialization import json_response
+from app.db.streaming import STREAM_MEDIA_TYPES, STREAM_PATTERN
+from app.schemas.order import OrderQuoteOut
+from app.schemas.pagination import Page
 from app.services.order_service import *
-from app.db.database import get_db
+from app.services.idempotency_service import run_idempotent, fingerprint
+from app.services.quote_service import quote_order
+from app.db.database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/orders",
     tags=["Orders"]
 )
 
-@router.get("/{order_id}", response_model=OrderOut, status_code=status.HTTP_200_OK)
-async def get_by_id(order_id: int, db: Session = Depends(get_db)):
-    return await get_order_by_id(order_id, db)
+# Va al primario: los clientes suelen leer el pedido justo después de crearlo
+@router.get("/{order_id}", response_model=OrderDetailOut, response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def get_by_id(
+    order_id: int,
+    expand: str | None = Query(None, description="Comma-separated relations to embed: `items`, `products` (implies items)."),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    expand_fields, selected = parse_expand(expand), parse_fields(fields, OrderOut)
+    order = await get_order_by_id(order_id, db, expand_fields, selected)
+    return json_response(order_type(expand_fields, selected), order, exclude_unset=True)
 
-@router.get("/", response_model=List[OrderOut], status_code=status.HTTP_200_OK)
-async def get_all(db: Session = Depends(get_db)):
-    return await get_all_orders(db)
+@router.get("/", response_model=Page[OrderDetailOut], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def get_all(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: int | None = None,
+    status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    expand: str | None = Query(None, description="Comma-separated relations to embed: `items`, `products` (implies items)."),
+    stream: str | None = Query(None, pattern=STREAM_PATTERN, description="Stream every matching row as `ndjson` or a `json` array instead of one page."),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = parse_fields(fields, OrderOut)
+    if stream:
+        return StreamingResponse(
+            stream_orders(stream, None, cursor, status, created_from, created_to, selected),
+            media_type=STREAM_MEDIA_TYPES[stream],
+        )
+    expand_fields = parse_expand(expand)
+    page = await get_all_orders(db, limit, cursor, status, created_from, created_to, expand_fields, selected)
+    return json_response(order_page_type(expand_fields, selected), page, exclude_unset=True)
 
 @router.get("/status/{status}", response_model=List[OrderOut], status_code=status.HTTP_200_OK)
-async def get_by_status(status: OrderStatus, db: Session = Depends(get_db)):
-    return await get_orders_by_status(status, db)
+async def get_by_status(
+    status: OrderStatus,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = parse_fields(fields, OrderOut)
+    return json_response(list[sparse_model(OrderOut, selected)], await get_orders_by_status(status, db, selected))
 
-@router.get("/user/{user_id}", response_model=List[OrderOut], status_code=status.HTTP_200_OK)
-async def get_by_user(user_id: int, db: Session = Depends(get_db)):
-    return await get_orders_by_user(user_id, db)
+@router.get("/user/{user_id}", response_model=Page[OrderDetailOut], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def get_by_user(
+    user_id: int,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: int | None = None,
+    status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    expand: str | None = Query(None, description="Comma-separated relations to embed: `items`, `products` (implies items)."),
+    stream: str | None = Query(None, pattern=STREAM_PATTERN, description="Stream every matching row as `ndjson` or a `json` array instead of one page."),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = parse_fields(fields, OrderOut)
+    if stream:
+        return StreamingResponse(
+            stream_orders(stream, user_id, cursor, status, created_from, created_to, selected),
+            media_type=STREAM_MEDIA_TYPES[stream],
+        )
+    expand_fields = parse_expand(expand)
+    page = await get_orders_by_user(user_id, db, limit, cursor, status, created_from, created_to, expand_fields, selected)
+    return json_response(order_page_type(expand_fields, selected), page, exclude_unset=True)
 
 @router.post("/", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
-async def create(order_data: OrderCreateWithItems, db: Session = Depends(get_db)):
-    return await create_order(order_data, db)
+async def create(
+    order_data: OrderCreateWithItems,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255, description="Client-generated key; retries with the same key and body return the first response instead of creating another order."),
+    db: AsyncSession = Depends(get_db),
+):
+    if idempotency_key is None:
+        return await create_order(order_data, db)
+    return await run_idempotent(
+        f"orders:{idempotency_key}",
+        fingerprint(order_data.model_dump_json()),
+        lambda: create_order(order_data, db),
+        response,
+    )
+
+@router.post("/quote", response_model=OrderQuoteOut, status_code=status.HTTP_200_OK)
+async def quote(order_data: OrderCreateWithItems, db: AsyncSession = Depends(get_db)):
+    """
+    Price a cart exactly as `POST /orders/` would, without creating the order or
+    reserving stock. Prices may be up to `PRICE_SNAPSHOT_REFRESH_SECONDS` old.
+    """
+    return json_response(OrderQuoteOut, await quote_order(order_data, db))
 
 @router.put("/{order_id}", response_model=OrderOut, status_code=status.HTTP_200_OK)
-async def update_order_by_id(order_id: int, order_data: OrderUpdate, db: Session = Depends(get_db)):
+async def update_order_by_id(order_id: int, order_data: OrderUpdate, db: AsyncSession = Depends(get_db)):
     return await update_order(order_id, order_data, db)
 
 @router.get("/{order_id}/items", response_model=List[OrderItemOut], status_code=status.HTTP_200_OK)
-async def get_order_items(order_id: int, db: Session = Depends(get_db)):
-    return await get_order_items_by_order(order_id, db)
+async def get_order_items(order_id: int, db: AsyncSession = Depends(get_read_db)):
+    return json_response(list[OrderItemOut], await get_order_items_by_order(order_id, db))
 
 @router.get("/items/{item_id}", response_model=OrderItemOut, status_code=status.HTTP_200_OK)
-async def get_order_item(item_id: int, db: Session = Depends(get_db)):
+async def get_order_item(item_id: int, db: AsyncSession = Depends(get_read_db)):
     return await get_order_item_by_id(item_id, db)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, status
+from app.core.config import settings
+from app.db.database import engine, replicas
+from app.services.order_service import order_batcher
+from common_db.engine import get_pool_stats
+
+router = APIRouter(prefix="/pool", tags=["Pool"])
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_stats():
+    return get_pool_stats(engine)
+
+@router.get("/replicas", status_code=status.HTTP_200_OK)
+async def get_replica_stats():
+    return replicas.stats()
+
+@router.get("/order-batches", status_code=status.HTTP_200_OK)
+async def get_order_batch_stats():
+    # Solo hay lotes con ORDER_GROUP_COMMIT activado
+    return {"enabled": settings.ORDER_GROUP_COMMIT, **order_batcher.stats()}
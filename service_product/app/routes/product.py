@@ -1,39 +1,182 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from decimal import Decimal
+from app.core.config import settings
+from app.core.fieldsets import FIELDS_DESCRIPTION, parse_fields, sparse_model
+from app.core.http_cache import conditional_response, content_etag
+from app.core.serialization import json_response, validate_many
 from app.models.models import ProductStatus
+from app.db.streaming import STREAM_MEDIA_TYPES, STREAM_PATTERN
+from app.schemas.pagination import Page
+from app.schemas.product import ProductBatchOut, ProductBatchRequest, ProductBulkResult
 from app.services.product_service import *
-from app.db.database import get_db
+from app.services.product_bulk_service import bulk_create_products, export_products, CSV_FORMAT, NDJSON_FORMAT
+from app.services.search_service import search_products
+from app.db.database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/products",
     tags=["Products"]
 )
 
-@router.get("/", response_model=List[ProductOut], status_code=status.HTTP_200_OK)
-async def get_products(db: Session = Depends(get_db)):
-    return await get_all_products(db)
+@router.get("/", response_model=Page[ProductOut], status_code=status.HTTP_200_OK)
+async def get_products(
+    request: Request,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: int | None = None,
+    status: ProductStatus | None = None,
+    category_id: int | None = None,
+    min_price: Decimal | None = Query(None, ge=0),
+    max_price: Decimal | None = Query(None, ge=0),
+    stream: str | None = Query(None, pattern=STREAM_PATTERN, description="Stream every matching row as `ndjson` or a `json` array instead of one page."),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = parse_fields(fields, ProductOut)
+    if stream:
+        return StreamingResponse(
+            stream_all_products(stream, cursor, status, category_id, min_price, max_price, selected),
+            media_type=STREAM_MEDIA_TYPES[stream],
+        )
+
+    # Los validadores salen de la propia página (O(limit)), no de un agregado sobre toda la tabla filtrada
+    page = await get_all_products(db, limit, cursor, status, category_id, min_price, max_price, selected)
+    schema = sparse_model(ProductOut, selected)
+    return conditional_response(
+        request, content_etag(schema, page.items, page.next_cursor), last_updated(page.items),
+        lambda: json_response(Page[schema], page),
+    )
 
 @router.post("/", response_model=ProductOut, status_code=status.HTTP_201_CREATED)
-async def add_product(product_data: ProductCreate, db: Session = Depends(get_db)):
+async def add_product(product_data: ProductCreate, db: AsyncSession = Depends(get_db)):
     return await create_product(product_data, db)
 
+@router.post("/bulk", response_model=ProductBulkResult, status_code=status.HTTP_200_OK)
+async def bulk_add_products(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Create many products from a streamed CSV (`text/csv`, with a header row) or NDJSON (`application/x-ndjson`) body.
+
+    Rows are validated as `ProductCreate` and inserted in batches, one transaction per batch;
+    invalid rows are skipped and reported by their 1-based row number.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    file_format = CSV_FORMAT if content_type == "text/csv" else NDJSON_FORMAT if content_type in ("application/x-ndjson", "application/jsonl") else content_type
+    return await bulk_create_products(request.stream(), file_format, db)
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export(format: str = Query(NDJSON_FORMAT, pattern=f"^({CSV_FORMAT}|{NDJSON_FORMAT})$")):
+    media_type = "text/csv" if format == CSV_FORMAT else "application/x-ndjson"
+    return StreamingResponse(export_products(format), media_type=media_type)
+
+# Las lecturas que rellenan la caché van al primario para no guardar datos con el retraso de una réplica
+@router.get("/search", response_model=Page[ProductOut], status_code=status.HTTP_200_OK)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in the name or description; each one also matches as a prefix."),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: int | None = Query(None, ge=0, description="`next_cursor` of the previous page (an offset into the ranking)."),
+    status: ProductStatus | None = None,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Products whose name or description contain every word of `q`, most relevant first
+    (name matches rank above description matches).
+    """
+    selected = parse_fields(fields, ProductOut)
+    page = await search_products(db, q, limit, cursor or 0, status, selected)
+    return json_response(Page[sparse_model(ProductOut, selected)], page)
+
+@router.get("/batch", response_model=ProductBatchOut[ProductOut], status_code=status.HTTP_200_OK)
+async def get_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated product ids (e.g. `3,1,2`); items come back in this order."),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Several products in one call (cart, wishlist). Ids that do not exist are listed in
+    `missing` instead of failing the request. For long lists use `POST /products/batch`.
+    """
+    try:
+        product_ids = [int(product_id) for product_id in ids.split(",") if product_id.strip()]
+    except ValueError:
+        product_ids = []
+    if not product_ids:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids must be a comma-separated list of integers")
+    selected = parse_fields(fields, ProductOut)
+    batch = await get_products_by_ids(product_ids, db)
+    # Como en /{product_id}, los validadores salen de los productos (normalmente de la caché), sin otra consulta
+    return conditional_response(
+        request, content_etag(sparse_model(ProductOut, selected), batch.items, batch.missing), last_updated(batch.items),
+        lambda: _batch_response(batch, selected),
+    )
+
+@router.post("/batch", response_model=ProductBatchOut[ProductOut], status_code=status.HTTP_200_OK)
+async def post_batch(
+    batch_request: ProductBatchRequest,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    selected = parse_fields(fields, ProductOut)
+    return _batch_response(await get_products_by_ids(batch_request.ids, db), selected)
+
+def _batch_response(batch: ProductBatchOut, selected: tuple[str, ...] | None):
+    schema = sparse_model(ProductOut, selected)
+    return json_response(ProductBatchOut[schema], ProductBatchOut[schema](items=validate_many(schema, batch.items), missing=batch.missing))
+
 @router.get("/{product_id}", response_model=ProductOut, status_code=status.HTTP_200_OK)
-async def get_by_id(product_id: int, db: Session = Depends(get_db)):
-    return await get_product_by_id(product_id, db)
+async def get_by_id(
+    product_id: int,
+    request: Request,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    selected = parse_fields(fields, ProductOut)
+    product = await get_product_by_id(product_id, db)
+    # La ficha completa viene de la caché: la selección solo recorta lo que se serializa
+    schema = sparse_model(ProductOut, selected)
+    return conditional_response(
+        request, content_etag(schema, [product]), product.updated_at,
+        lambda: json_response(schema, schema.model_validate(product)),
+    )
 
 @router.get("/category/{category_id}", response_model=List[ProductOut], status_code=status.HTTP_200_OK)
-async def get_by_category(category_id: int, db: Session = Depends(get_db)):
-    return await get_all_products_by_category(category_id, db)
+async def get_by_category(
+    category_id: int,
+    request: Request,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    selected = parse_fields(fields, ProductOut)
+    # La lista suele venir de la caché, así que los validadores se calculan sobre ella sin consultar la BD
+    products = await get_all_products_by_category(category_id, db)
+    schema = sparse_model(ProductOut, selected)
+    return conditional_response(
+        request, content_etag(schema, products), last_updated(products),
+        lambda: json_response(list[schema], validate_many(schema, products)),
+    )
 
 @router.get("/status/{product_status}", response_model=List[ProductOut], status_code=status.HTTP_200_OK)
-async def get_by_status(product_status: ProductStatus, db: Session = Depends(get_db)):  
-    return await get_all_products_by_status(product_status, db)
+async def get_by_status(
+    product_status: ProductStatus,
+    request: Request,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = parse_fields(fields, ProductOut)
+    products = await get_all_products_by_status(product_status, db, selected)
+    schema = sparse_model(ProductOut, selected)
+    return conditional_response(
+        request, content_etag(schema, products), last_updated(products),
+        lambda: json_response(list[schema], products),
+    )
 
 @router.put("/{product_id}", response_model=ProductOut, status_code=status.HTTP_200_OK)
-async def update_product_by_id(product_id: int, product_data: ProductUpdate, db: Session = Depends(get_db)):
+async def update_product_by_id(product_id: int, product_data: ProductUpdate, db: AsyncSession = Depends(get_db)):
     return await update_product(product_id, product_data, db)
 
 @router.delete("/{product_id}", response_model=ProductOut, status_code=status.HTTP_200_OK)
-async def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
     return await deactivate_product(product_id, db)
\ No newline at end of file
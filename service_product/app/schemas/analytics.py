@@ -0,0 +1,45 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import date
+from decimal import Decimal
+
+class DailyRevenueOut(BaseModel):
+    day: date
+    orders: int
+    subtotal: Decimal
+    iva_amount: Decimal
+    total_amount: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CategoryRevenueOut(BaseModel):
+    category_id: int | None
+    category_name: str | None
+    units: int
+    subtotal: Decimal
+    iva_amount: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductRevenueOut(BaseModel):
+    product_id: int
+    product_name: str
+    units: int
+    subtotal: Decimal
+    iva_amount: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+class StatusBreakdownOut(BaseModel):
+    status: str
+    orders: int
+    total_amount: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+class IvaSummaryOut(BaseModel):
+    orders: int
+    subtotal: Decimal
+    iva_amount: Decimal
+    total_amount: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
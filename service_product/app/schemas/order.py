@@ -3,10 +3,13 @@ from datetime import datetime
 from typing import List
 from decimal import Decimal
 from app.models.models import OrderStatus
+from app.schemas.product import ProductOut
 
 class OrderOut(BaseModel):
     id: int
     user_id: int
+    subtotal: Decimal
+    iva_total: Decimal
     total_amount: Decimal
     status: str
     created_at: datetime
@@ -20,9 +23,18 @@ class OrderItemOut(BaseModel):
     quantity: int
     price_at_time_of_order: Decimal
     iva_at_time_of_order: Decimal
+    subtotal: Decimal
+    iva_amount: Decimal
+    line_total: Decimal
 
     model_config = ConfigDict(from_attributes=True)
 
+class OrderItemDetailOut(OrderItemOut):
+    product: ProductOut | None = None
+
+class OrderDetailOut(OrderOut):
+    items: List[OrderItemDetailOut] | None = None
+
 class OrderItemCreateInput(BaseModel):
     product_id: int
     quantity: int = Field(..., gt=0, description="Cantidad del producto (Mayor que 0).")
@@ -31,5 +43,23 @@ class OrderCreateWithItems(BaseModel):
     user_id: int
     items: List[OrderItemCreateInput] = Field(..., min_length=1, description="Lista de productos en la orden.")
 
+class OrderQuoteItemOut(BaseModel):
+    product_id: int
+    quantity: int
+    price_at_time_of_order: Decimal
+    iva_at_time_of_order: Decimal
+    subtotal: Decimal
+    iva_amount: Decimal
+    line_total: Decimal
+    # Un producto inactivo o agotado se cotiza igual; el cliente decide si lo muestra
+    product_status: str
+
+class OrderQuoteOut(BaseModel):
+    user_id: int
+    subtotal: Decimal
+    iva_total: Decimal
+    total_amount: Decimal
+    items: List[OrderQuoteItemOut]
+
 class OrderUpdate(BaseModel):
     status: OrderStatus | None = None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import Generic, List, TypeVar
 from decimal import Decimal
 from app.models.models import ProductStatus
 
@@ -11,11 +12,21 @@ class ProductOut(BaseModel):
     price: Decimal
     iva: Decimal
     category_id: int | None = None
+    stock: int | None = None
     status: str
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="Ids de los productos, en el orden en que se quieren recibir.")
+
+T = TypeVar("T")
+
+class ProductBatchOut(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int]
+
 class ProductCreate(BaseModel):
     name: str
     description: str | None = None
@@ -23,6 +34,7 @@ class ProductCreate(BaseModel):
     price: Decimal = Field(..., gt=0, description="Precio del producto (mayor que 0).")
     iva: Decimal = Field(..., ge=0, le=1, description="IVA como decimal entre 0 y 1.")
     category_id: int | None = None
+    stock: int | None = Field(default=None, ge=0, description="Unidades disponibles (vacío = sin control de inventario).")
 
 class ProductUpdate(BaseModel):
     name: str | None = None
@@ -31,5 +43,14 @@ class ProductUpdate(BaseModel):
     price: Decimal | None = Field(default=None, gt=0, description="Nuevo precio (si se provee, debe ser > 0).")
     iva: Decimal | None = Field(default=None, ge=0, le=1, description="Nuevo IVA (entre 0 y 1 si se provee).")
     category_id: int | None = None
+    stock: int | None = Field(default=None, ge=0, description="Nuevas unidades disponibles.")
     status: ProductStatus | None = None
 
+class ProductBulkError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ProductBulkResult(BaseModel):
+    received: int
+    inserted: int
+    errors: List[ProductBulkError]
@@ -0,0 +1,156 @@
+from datetime import date
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import upsert_increment
+from app.models.models import Order, OrderItem, OrderStatus, Product, Category, OrderDailyStats, ProductDailySales
+from app.schemas.analytics import DailyRevenueOut, CategoryRevenueOut, ProductRevenueOut, StatusBreakdownOut, IvaSummaryOut
+
+TOP_PRODUCTS_ORDER = {"units": ProductDailySales.units, "subtotal": ProductDailySales.subtotal}
+
+
+# --- Mantenimiento de los agregados (misma transacción que el pedido) ---
+
+async def record_order(order: Order, items: list[OrderItem], db: AsyncSession) -> None:
+    """Add a new order to the daily rollups. `order.created_at` must already be loaded (flush + refresh)."""
+    await record_orders([(order, items)], db)
+
+async def record_orders(orders: list[tuple[Order, list[OrderItem]]], db: AsyncSession) -> None:
+    """
+    Add several new orders to the daily rollups with one upsert per table, whatever
+    their number (used by the group commit of create_order).
+    """
+    order_rows: dict[tuple, dict] = {}
+    product_rows: dict[tuple, dict] = {}
+    for order, items in orders:
+        day = order.created_at.date()
+        row = order_rows.setdefault((day, order.status.name), {
+            "day": day, "status": order.status, "orders": 0, "subtotal": 0, "iva_amount": 0, "total_amount": 0,
+        })
+        row["orders"] += 1
+        row["subtotal"] += order.subtotal
+        row["iva_amount"] += order.iva_total
+        row["total_amount"] += order.total_amount
+        for item in items:
+            row = product_rows.setdefault((day, item.product_id), {
+                "day": day, "product_id": item.product_id, "units": 0, "subtotal": 0, "iva_amount": 0,
+            })
+            row["units"] += item.quantity
+            row["subtotal"] += item.subtotal
+            row["iva_amount"] += item.iva_amount
+
+    # En el orden de la clave, para no provocar bloqueos mutuos entre transacciones. La fila (día, estado)
+    # la comparten todos los pedidos del día: va la última, para retener su bloqueo solo hasta el commit
+    await upsert_increment(db, ProductDailySales.__table__, ["day", "product_id"], [product_rows[key] for key in sorted(product_rows)])
+    await upsert_increment(db, OrderDailyStats.__table__, ["day", "status"], [order_rows[key] for key in sorted(order_rows)])
+
+async def record_status_change(order: Order, old_status: OrderStatus, new_status: OrderStatus, db: AsyncSession) -> None:
+    """Move an order between status rows; a cancellation also takes its units out of the product sales."""
+    day = order.created_at.date()
+    if new_status == OrderStatus.CANCELED:
+        items = (await db.execute(
+            select(OrderItem.product_id, OrderItem.quantity, OrderItem.subtotal, OrderItem.iva_amount)
+            .where(OrderItem.order_id == order.id)
+            .order_by(OrderItem.product_id)
+        )).all()
+        await upsert_increment(db, ProductDailySales.__table__, ["day", "product_id"], [
+            {"day": day, "product_id": product_id, "units": -quantity, "subtotal": -subtotal, "iva_amount": -iva_amount}
+            for product_id, quantity, subtotal, iva_amount in items
+        ])
+
+    # Las filas por estado al final, como en record_orders
+    rows = [
+        {"day": day, "status": old_status, "orders": -1, "subtotal": -order.subtotal, "iva_amount": -order.iva_total, "total_amount": -order.total_amount},
+        {"day": day, "status": new_status, "orders": 1, "subtotal": order.subtotal, "iva_amount": order.iva_total, "total_amount": order.total_amount},
+    ]
+    await upsert_increment(db, OrderDailyStats.__table__, ["day", "status"], sorted(rows, key=lambda row: row["status"].name))
+
+
+# --- Consultas (O(días) u O(días × productos), nunca O(pedidos)) ---
+
+def _between(stmt, day_column, date_from: date | None, date_to: date | None):
+    if date_from is not None:
+        stmt = stmt.where(day_column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(day_column <= date_to)
+    return stmt
+
+async def get_daily_revenue(db: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> list[DailyRevenueOut]:
+    # Los ingresos excluyen los pedidos cancelados
+    stmt = _between(
+        select(
+            OrderDailyStats.day,
+            func.sum(OrderDailyStats.orders).label("orders"),
+            func.sum(OrderDailyStats.subtotal).label("subtotal"),
+            func.sum(OrderDailyStats.iva_amount).label("iva_amount"),
+            func.sum(OrderDailyStats.total_amount).label("total_amount"),
+        ).where(OrderDailyStats.status != OrderStatus.CANCELED),
+        OrderDailyStats.day, date_from, date_to,
+    )
+    rows = (await db.execute(stmt.group_by(OrderDailyStats.day).order_by(OrderDailyStats.day))).all()
+    return [DailyRevenueOut.model_validate(row) for row in rows]
+
+async def get_revenue_by_category(db: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> list[CategoryRevenueOut]:
+    # Se agrupa por la categoría actual del producto
+    stmt = _between(
+        select(
+            Product.category_id,
+            Category.name.label("category_name"),
+            func.sum(ProductDailySales.units).label("units"),
+            func.sum(ProductDailySales.subtotal).label("subtotal"),
+            func.sum(ProductDailySales.iva_amount).label("iva_amount"),
+        )
+        .join(Product, Product.id == ProductDailySales.product_id)
+        .outerjoin(Category, Category.id == Product.category_id),
+        ProductDailySales.day, date_from, date_to,
+    )
+    stmt = stmt.group_by(Product.category_id, Category.name).order_by(func.sum(ProductDailySales.subtotal).desc())
+    return [CategoryRevenueOut.model_validate(row) for row in (await db.execute(stmt)).all()]
+
+async def get_revenue_by_product(
+    db: AsyncSession,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    order_by: str = "subtotal",
+    limit: int | None = None,
+) -> list[ProductRevenueOut]:
+    stmt = _between(
+        select(
+            ProductDailySales.product_id,
+            Product.name.label("product_name"),
+            func.sum(ProductDailySales.units).label("units"),
+            func.sum(ProductDailySales.subtotal).label("subtotal"),
+            func.sum(ProductDailySales.iva_amount).label("iva_amount"),
+        ).join(Product, Product.id == ProductDailySales.product_id),
+        ProductDailySales.day, date_from, date_to,
+    )
+    stmt = (
+        stmt.group_by(ProductDailySales.product_id, Product.name)
+        .having(func.sum(ProductDailySales.units) > 0)
+        .order_by(func.sum(TOP_PRODUCTS_ORDER[order_by]).desc(), ProductDailySales.product_id)
+        .limit(limit)
+    )
+    return [ProductRevenueOut.model_validate(row) for row in (await db.execute(stmt)).all()]
+
+async def get_status_breakdown(db: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> list[StatusBreakdownOut]:
+    stmt = _between(
+        select(
+            OrderDailyStats.status,
+            func.sum(OrderDailyStats.orders).label("orders"),
+            func.sum(OrderDailyStats.total_amount).label("total_amount"),
+        ),
+        OrderDailyStats.day, date_from, date_to,
+    )
+    rows = (await db.execute(stmt.group_by(OrderDailyStats.status).order_by(OrderDailyStats.status))).all()
+    return [StatusBreakdownOut.model_validate(row) for row in rows if row.orders]
+
+async def get_iva_summary(db: AsyncSession, date_from: date | None = None, date_to: date | None = None) -> IvaSummaryOut:
+    stmt = _between(
+        select(
+            func.coalesce(func.sum(OrderDailyStats.orders), 0).label("orders"),
+            func.coalesce(func.sum(OrderDailyStats.subtotal), 0).label("subtotal"),
+            func.coalesce(func.sum(OrderDailyStats.iva_amount), 0).label("iva_amount"),
+            func.coalesce(func.sum(OrderDailyStats.total_amount), 0).label("total_amount"),
+        ).where(OrderDailyStats.status != OrderStatus.CANCELED),
+        OrderDailyStats.day, date_from, date_to,
+    )
+    return IvaSummaryOut.model_validate((await db.execute(stmt)).one())
@@ -1,40 +1,68 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from app.models.models import Category
+from app.core.cache import cache, product_key, category_products_key, categories_page_key, CATEGORIES_PREFIX
+from app.db.pagination import paginate
+from app.models.models import Category, Product
+from app.schemas.pagination import Page
 from app.schemas.category import CategoryOut, CategoryInput
 
-async def get_category_by_id(category_id: int, db: Session) -> CategoryOut:
-    categoy = db.query(Category).filter(Category.id == category_id).first()
+async def get_category_by_id(category_id: int, db: AsyncSession) -> CategoryOut:
+    categoy = await db.scalar(select(Category).where(Category.id == category_id))
     if not categoy:
         raise HTTPException(status_code=404, detail="Category not found")
     return CategoryOut.model_validate(categoy)
 
-async def get_all_categories(db: Session) -> list[CategoryOut]:
-    categories = db.query(Category).all()
-    return [CategoryOut.model_validate(category) for category in categories]
+async def get_all_categories(db: AsyncSession, limit: int, cursor: int | None = None) -> Page[CategoryOut]:
+    cached = await cache.get(categories_page_key(limit, cursor))
+    if cached is not None:
+        return cached
 
-async def create_category(category_data: CategoryInput, db: Session) -> CategoryOut:
+    page = await paginate(db, select(Category), Category.id, CategoryOut, limit, cursor)
+    await cache.set(categories_page_key(limit, cursor), page)
+    return page
+
+async def create_category(category_data: CategoryInput, db: AsyncSession) -> CategoryOut:
     new_category = Category(name=category_data.name)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
+    await cache.delete_prefix(CATEGORIES_PREFIX)
     return CategoryOut.model_validate(new_category)
 
-async def update_category(category_id: int, category_data: CategoryInput, db: Session) -> CategoryOut:
-    category = db.query(Category).filter(Category.id == category_id).first()
+async def update_category(category_id: int, category_data: CategoryInput, db: AsyncSession) -> CategoryOut:
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     category.name = category_data.name
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    await cache.delete_prefix(CATEGORIES_PREFIX)
     return CategoryOut.model_validate(category)
 
-async def delete_category(category_id: int, db: Session) -> CategoryOut:
-    category = db.query(Category).filter(Category.id == category_id).first()
+async def delete_category(category_id: int, db: AsyncSession) -> CategoryOut:
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    db.delete(category)
-    db.commit()
-    return CategoryOut.model_validate(category)
\ No newline at end of file
+    # Se desvinculan con un UPDATE en vez de dejarlo al ON DELETE SET NULL, que no toca updated_at:
+    # es el Last-Modified de esos productos y lo que leen los refrescos incrementales por updated_at
+    product_ids = (await db.scalars(select(Product.id).where(Product.category_id == category_id).with_for_update())).all()
+    if product_ids:
+        await db.execute(
+            update(Product)
+            .where(Product.category_id == category_id)
+            .values(category_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    await db.delete(category)
+    await db.commit()
+    await cache.delete_prefix(CATEGORIES_PREFIX)
+    await cache.delete(
+        category_products_key(category_id),
+        category_products_key(None),
+        *[product_key(product_id) for product_id in product_ids],
+    )
+    return CategoryOut.model_validate(category)
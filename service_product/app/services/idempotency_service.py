@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+from fastapi import HTTPException, Response, status
+from app.core.cache import build_cache
+from app.core.config import settings
+
+IDEMPOTENCY_PREFIX = "idempotency:"
+REPLAYED_HEADER = "Idempotent-Replayed"
+_POLL_SECONDS = 0.05
+
+# Separada de la caché del catálogo: otro TTL y sin expulsiones por las lecturas de productos
+idempotency_store = build_cache(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_ENTRIES)
+
+# Peticiones en curso en este worker, para que los duplicados concurrentes esperen a la primera
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def fingerprint(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _replay(record: dict, request_fingerprint: str, response: Response) -> Any:
+    if record["fingerprint"] != request_fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    response.headers[REPLAYED_HEADER] = "true"
+    if record["status_code"] >= 400:
+        raise HTTPException(status_code=record["status_code"], detail=record["body"], headers={REPLAYED_HEADER: "true"})
+    return record["body"]
+
+async def _claim(cache_key: str, request_fingerprint: str) -> dict | None:
+    """
+    Reserve `cache_key` for this request, or return the stored record once the request
+    that holds it (possibly in another worker) has finished.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_SECONDS
+    pending = {"fingerprint": request_fingerprint, "status_code": None, "body": None}
+    while time.monotonic() < deadline:
+        # La reserva caduca sola si el worker que la tiene se cae
+        if await idempotency_store.add(cache_key, pending, ttl=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return None
+        record = await idempotency_store.get(cache_key)
+        if record is not None:
+            if record["fingerprint"] != request_fingerprint or record["status_code"] is not None:
+                return record
+            await asyncio.sleep(_POLL_SECONDS)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed",
+    )
+
+async def _execute(cache_key: str, request_fingerprint: str, operation: Callable[[], Awaitable[Any]]) -> dict:
+    try:
+        body = await operation()
+    except HTTPException as e:
+        if e.status_code >= 500:
+            await idempotency_store.delete(cache_key)
+            raise
+        record = {"fingerprint": request_fingerprint, "status_code": e.status_code, "body": e.detail}
+    except BaseException:
+        # Los fallos inesperados no se guardan: el reintento vuelve a ejecutar la operación
+        await idempotency_store.delete(cache_key)
+        raise
+    else:
+        record = {"fingerprint": request_fingerprint, "status_code": status.HTTP_201_CREATED, "body": body}
+    await idempotency_store.set(cache_key, record)
+    return record
+
+async def run_idempotent(
+    key: str,
+    request_fingerprint: str,
+    operation: Callable[[], Awaitable[Any]],
+    response: Response,
+) -> Any:
+    """
+    Run `operation` once per `key` and return its result; retries with the same key
+    and body get the stored result (or 4xx error) back, marked with `Idempotent-Replayed`.
+
+    Concurrent duplicates in this worker wait for the first one; across workers the
+    first request reserves the key in the shared store and the others poll it.
+    """
+    cache_key = IDEMPOTENCY_PREFIX + key
+
+    in_flight = _in_flight.get(cache_key)
+    if in_flight is not None:
+        record = await asyncio.shield(in_flight)
+        if record is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The original request with this Idempotency-Key failed; retry it",
+            )
+        return _replay(record, request_fingerprint, response)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[cache_key] = future
+    record = None
+    try:
+        record = await _claim(cache_key, request_fingerprint)
+        if record is not None:
+            return _replay(record, request_fingerprint, response)
+        record = await _execute(cache_key, request_fingerprint, operation)
+    finally:
+        del _in_flight[cache_key]
+        future.set_result(record)
+
+    if record["status_code"] >= 400:
+        raise HTTPException(status_code=record["status_code"], detail=record["body"])
+    return record["body"]
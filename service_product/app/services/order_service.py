@@ -1,123 +1,369 @@
-from sqlalchemy.orm import Session
+import logging
+from functools import partial
+from typing import Callable
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from fastapi import status
 from decimal import Decimal
+from datetime import datetime
+from app.core.config import settings
+from app.core.group_commit import GroupCommitter
+from app.core.pricing import order_total, price_line
+from app.core.fieldsets import fieldset_columns, select_fields, sparse_model
+from app.core.serialization import validate_many
+from app.db.pagination import paginate
+from app.db.database import SessionLocal
+from app.db.streaming import stream_models
+from app.schemas.pagination import Page
 from app.models.models import Product, User
 from app.models.models import Order, OrderItem, OrderStatus
-from app.schemas.order import OrderOut, OrderItemOut, OrderCreateWithItems, OrderUpdate
+from app.services.stock_service import reserve_stock, release_stock, invalidate_products
+from app.services.analytics_service import record_order, record_orders, record_status_change
+from app.schemas.order import OrderOut, OrderItemOut, OrderDetailOut, OrderItemDetailOut, OrderCreateWithItems, OrderUpdate
+from app.schemas.product import ProductOut
 
-async def get_order_by_id(order_id: int, db: Session) -> OrderOut:
-    order = db.query(Order).filter(Order.id == order_id).first()
+logger = logging.getLogger("orders")
+
+EXPAND_ITEMS = "items"
+EXPAND_PRODUCTS = "products"
+
+def parse_expand(expand: str | None) -> set[str]:
+    if not expand:
+        return set()
+    fields = {field.strip() for field in expand.split(",") if field.strip()}
+    unknown = fields - {EXPAND_ITEMS, EXPAND_PRODUCTS}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown expand value(s): {', '.join(sorted(unknown))}. Use items and/or products."
+        )
+    # Los productos se anidan dentro de los ítems
+    if EXPAND_PRODUCTS in fields:
+        fields.add(EXPAND_ITEMS)
+    return fields
+
+def _order_select(expand: set[str], fields: tuple[str, ...] | None = None):
+    # Sin relaciones que anidar bastan filas Core, más baratas que objetos ORM
+    if not expand:
+        return select_fields(Order, fields)
+    return select(Order).options(load_only(*fieldset_columns(Order, fields))) if fields else select(Order)
+
+def order_type(expand: set[str], fields: tuple[str, ...] | None = None) -> type[OrderOut]:
+    """Model to serialize an order with: only expanded orders carry `items`."""
+    if expand:
+        return sparse_model(OrderDetailOut, None if fields is None else fields + (EXPAND_ITEMS,))
+    return sparse_model(OrderOut, fields)
+
+def order_page_type(expand: set[str], fields: tuple[str, ...] | None = None) -> type[Page]:
+    return Page[order_type(expand, fields)]
+
+def _with_expand(stmt, expand: set[str]):
+    # selectinload: una consulta adicional por relación, sin importar cuántos ítems haya
+    if EXPAND_PRODUCTS in expand:
+        return stmt.options(selectinload(Order.order_items).selectinload(OrderItem.product))
+    if EXPAND_ITEMS in expand:
+        return stmt.options(selectinload(Order.order_items))
+    return stmt
+
+def _order_serializer(expand: set[str], fields: tuple[str, ...] | None = None):
+    order_schema = sparse_model(OrderOut, fields)
+    if not expand:
+        return order_schema.model_validate
+    detail_schema = order_type(expand, fields)
+
+    def serialize(order: Order) -> OrderDetailOut:
+        items = []
+        for item in order.order_items:
+            item_detail = OrderItemOut.model_validate(item).model_dump()
+            if EXPAND_PRODUCTS in expand:
+                item_detail["product"] = ProductOut.model_validate(item.product)
+            items.append(OrderItemDetailOut(**item_detail))
+        return detail_schema(**order_schema.model_validate(order).model_dump(), items=items)
+
+    return serialize
+
+async def get_order_by_id(order_id: int, db: AsyncSession, expand: set[str] = frozenset(), fields: tuple[str, ...] | None = None) -> OrderOut:
+    # Una sola fila: siempre como entidad, con load_only para no leer las columnas no pedidas
+    stmt = select(Order).options(load_only(*fieldset_columns(Order, fields))) if fields else select(Order)
+    order = await db.scalar(_with_expand(stmt.where(Order.id == order_id), expand))
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    return OrderOut.model_validate(order)
+    return _order_serializer(expand, fields)(order)
 
-async def get_all_orders(db: Session) -> list[OrderOut]:
-    orders = db.query(Order).all()
-    return [OrderOut.model_validate(order) for order in orders]
+def _filter_orders(stmt, status: OrderStatus | None, created_from: datetime | None, created_to: datetime | None):
+    if status is not None:
+        stmt = stmt.where(Order.status == status)
+    if created_from is not None:
+        stmt = stmt.where(Order.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Order.created_at <= created_to)
+    return stmt
 
-async def get_orders_by_status(status: OrderStatus, db: Session) -> list[OrderOut]:
-    orders = db.query(Order).filter(Order.status == status).all()
-    return [OrderOut.model_validate(order) for order in orders]
+async def get_all_orders(
+    db: AsyncSession,
+    limit: int,
+    cursor: int | None = None,
+    status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    expand: set[str] = frozenset(),
+    fields: tuple[str, ...] | None = None,
+) -> Page[OrderOut]:
+    stmt = _with_expand(_filter_orders(_order_select(expand, fields), status, created_from, created_to), expand)
+    return await paginate(db, stmt, Order.id, order_type(expand, fields), limit, cursor, _order_serializer(expand, fields) if expand else None)
 
-async def get_orders_by_user(user_id: int, db: Session) -> list[OrderOut]:
-    orders = db.query(Order).filter(Order.user_id == user_id).all()
-    return [OrderOut.model_validate(order) for order in orders]
+def stream_orders(
+    stream_format: str,
+    user_id: int | None = None,
+    cursor: int | None = None,
+    status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    fields: tuple[str, ...] | None = None,
+):
+    stmt = _filter_orders(select_fields(Order, fields), status, created_from, created_to)
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    if cursor is not None:
+        stmt = stmt.where(Order.id > cursor)
+    return stream_models(stmt.order_by(Order.id), sparse_model(OrderOut, fields), stream_format)
 
-async def create_order(order_data: OrderCreateWithItems, db: Session) -> OrderOut:
+async def get_orders_by_status(status: OrderStatus, db: AsyncSession, fields: tuple[str, ...] | None = None) -> list[OrderOut]:
+    rows = (await db.execute(select_fields(Order, fields).where(Order.status == status))).all()
+    return validate_many(sparse_model(OrderOut, fields), rows)
+
+async def get_orders_by_user(
+    user_id: int,
+    db: AsyncSession,
+    limit: int,
+    cursor: int | None = None,
+    status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    expand: set[str] = frozenset(),
+    fields: tuple[str, ...] | None = None,
+) -> Page[OrderOut]:
+    stmt = _filter_orders(_order_select(expand, fields).where(Order.user_id == user_id), status, created_from, created_to)
+    return await paginate(db, _with_expand(stmt, expand), Order.id, order_type(expand, fields), limit, cursor, _order_serializer(expand, fields) if expand else None)
+
+def cart_quantities(order_data: OrderCreateWithItems) -> dict[int, int]:
+    """Cart lines grouped by product (repeated products add up), in order of first appearance."""
+    quantities: dict[int, int] = {}
+    for item_data in order_data.items:
+        if item_data.quantity <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantity for product ID {item_data.product_id} must be positive."
+            )
+        quantities[item_data.product_id] = quantities.get(item_data.product_id, 0) + item_data.quantity
+    return quantities
+
+async def create_order(order_data: OrderCreateWithItems, db: AsyncSession) -> OrderOut:
     # 0. Validar la existencia del usuario
-    user = db.query(User).filter(User.id == order_data.user_id).first()
+    user = await db.scalar(select(User).where(User.id == order_data.user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID {order_data.user_id} not found."
         )
 
-    new_order_items = []
-    total_amount = Decimal('0.00')
+    # 1. Agrupar los ítems del carrito por producto (sumando cantidades repetidas)
+    quantities = cart_quantities(order_data)
 
-    # 1. Verificar y procesar cada ítem del carrito
-    for item_data in order_data.items:
-        # 1.1. Verificar existencia del producto
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
-        if not product:
+    # 1.1. Resolver todos los productos del carrito en una sola consulta
+    products = (await db.scalars(select(Product).where(Product.id.in_(quantities)))).all()
+    products_by_id = {product.id: product for product in products}
+
+    for product_id in quantities:
+        if product_id not in products_by_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID {item_data.product_id} not found or not active."
+                detail=f"Product with ID {product_id} not found or not active."
             )
 
-        if item_data.quantity <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Quantity for product ID {item_data.product_id} must be positive."
-            )
+    lines = []
+    subtotal = Decimal('0.00')
+    iva_total = Decimal('0.00')
 
-        #1.2. Calcular subtotal e IVA por ítem 
-        item_subtotal = item_data.quantity * product.price
-        item_iva_amount = item_subtotal * product.iva
+    # 1.2. Calcular subtotal e IVA por ítem y acumular al total en una sola pasada
+    for product_id, quantity in quantities.items():
+        product = products_by_id[product_id]
+        item_subtotal, item_iva_amount = price_line(quantity, product.price, product.iva)
 
-        # 1.3. Crear instancia de OrderItem y acumular al total
-        order_item = OrderItem(
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            price_at_time_of_order=product.price,
-            iva_at_time_of_order=product.iva
-        )
-        new_order_items.append(order_item)
-        total_amount += item_subtotal + item_iva_amount
+        lines.append({
+            "product_id": product_id,
+            "quantity": quantity,
+            "price_at_time_of_order": product.price,
+            "iva_at_time_of_order": product.iva,
+            "subtotal": item_subtotal,
+            "iva_amount": item_iva_amount,
+            "line_total": item_subtotal + item_iva_amount,
+        })
+        subtotal += item_subtotal
+        iva_total += item_iva_amount
+
+    build = partial(_build_order, order_data.user_id, lines, subtotal, iva_total)
+    if settings.ORDER_GROUP_COMMIT:
+        # Esta sesión solo ha leído: se libera su conexión mientras el pedido espera a su lote
+        await db.rollback()
+        return await order_batcher.submit((build, quantities))
+    return await _save_order(build(), quantities, db)
 
-    # 2. Crear la instancia de Order principal
+def _build_order(user_id: int, lines: list[dict], subtotal: Decimal, iva_total: Decimal) -> Order:
+    # 2. Crear la instancia de Order principal con sus OrderItems (una nueva en cada intento de guardarla)
     new_order = Order(
-        user_id=order_data.user_id,
-        total_amount=total_amount,
+        user_id=user_id,
+        subtotal=subtotal,
+        iva_total=iva_total,
+        total_amount=order_total(subtotal, iva_total),
         status=OrderStatus.PENDING
     )
+    new_order.order_items = [OrderItem(**line) for line in lines]
+    return new_order
+
+async def _save_order(new_order: Order, quantities: dict[int, int], db: AsyncSession) -> OrderOut:
+    # 3. Reservar el stock de forma atómica (sin SELECT previo, evita sobreventa)
+    try:
+        await reserve_stock(quantities, db)
+    except HTTPException:
+        await db.rollback()
+        raise
 
-    # 3. Asociar OrderItems a la Order y agregarlos a la sesión
-    new_order.order_items = new_order_items
     db.add(new_order)
-    db.flush()
 
-    # 4. Guardar la orden y sus ítems en la base de datos (con manejo de errores)
+    # 4. Guardar la orden, sus ítems y los agregados diarios en una transacción (con manejo de errores)
     try:
-        db.commit()
-        db.refresh(new_order)
+        await db.flush()
+        # Solo el valor calculado por la BD: un refresh completo expiraría también los ítems (cascade "all")
+        await db.refresh(new_order, ["created_at"])
+        # Los agregados, justo antes del commit: su fila del día la comparten todos los pedidos
+        await record_order(new_order, new_order.order_items, db)
+        await db.commit()
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error processing order due to data inconsistency: {e.orig.args[1] if e.orig else e}."
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Unexpected error creating order: {e}")
 
+    await invalidate_products(list(quantities), db)
+
     # 5. Retornar la orden creada
     return OrderOut.model_validate(new_order)
 
-async def update_order(order_id: int, order_data: OrderUpdate, db: Session) -> OrderOut:
-    order = db.query(Order).filter(Order.id == order_id).first()
+async def _save_order_batch(pending: list[tuple[Callable[[], Order], dict[int, int]]]) -> list:
+    """
+    Group commit of `create_order`: reserve the stock of each order (an order without
+    stock is rejected alone), insert every accepted order with its items, update the
+    rollups and commit, all in one transaction. Returns an OrderOut or an HTTPException
+    per order. If the batch transaction fails, each order is retried in its own.
+    """
+    results: list = [None] * len(pending)
+    accepted: list[tuple[int, Order]] = []
+    try:
+        async with SessionLocal() as db:
+            # Las filas de stock de todo el lote se bloquean de una vez en orden de product_id (como hace
+            # reserve_stock con cada pedido): dos lotes nunca se esperan mutuamente (deadlock en MySQL)
+            product_ids = sorted({product_id for _, quantities in pending for product_id in quantities})
+            await db.execute(select(Product.id).where(Product.id.in_(product_ids)).order_by(Product.id).with_for_update())
+            for index, (build, quantities) in enumerate(pending):
+                try:
+                    await reserve_stock(quantities, db, undo_on_failure=True)
+                except HTTPException as e:
+                    results[index] = e
+                    continue
+                new_order = build()
+                db.add(new_order)
+                accepted.append((index, new_order))
+
+            if accepted:
+                await db.flush()
+                # created_at de todo el lote en una consulta, en vez de un refresh por pedido
+                created = dict((await db.execute(
+                    select(Order.id, Order.created_at).where(Order.id.in_([new_order.id for _, new_order in accepted]))
+                )).all())
+                for _, new_order in accepted:
+                    set_committed_value(new_order, "created_at", created[new_order.id])
+                await record_orders([(new_order, new_order.order_items) for _, new_order in accepted], db)
+            await db.commit()
+    except Exception as e:
+        logger.warning("Order batch of %d failed, saving its orders one by one: %s", len(pending), e)
+        return [await _save_order_alone(build, quantities) for build, quantities in pending]
+
+    product_ids = sorted({product_id for index, _ in accepted for product_id in pending[index][1]})
+    if product_ids:
+        async with SessionLocal() as db:
+            await invalidate_products(product_ids, db)
+    for index, new_order in accepted:
+        results[index] = OrderOut.model_validate(new_order)
+    return results
+
+async def _save_order_alone(build: Callable[[], Order], quantities: dict[int, int]) -> OrderOut | HTTPException:
+    async with SessionLocal() as db:
+        try:
+            return await _save_order(build(), quantities, db)
+        except HTTPException as e:
+            return e
+
+order_batcher = GroupCommitter(_save_order_batch, settings.ORDER_BATCH_MAX_ORDERS, settings.ORDER_BATCH_MAX_DELAY_MS / 1000)
+
+async def update_order(order_id: int, order_data: OrderUpdate, db: AsyncSession) -> OrderOut:
+    order = await db.scalar(select(Order).where(Order.id == order_id))
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    for key, value in order_data.model_dump(exclude_unset=True).items():
+
+    updates = order_data.model_dump(exclude_unset=True)
+    new_status = updates.get("status")
+    released_product_ids = []
+
+    if order.status == OrderStatus.CANCELED and new_status not in (None, OrderStatus.CANCELED):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Canceled orders cannot be reopened")
+
+    if new_status is not None and new_status != order.status:
+        # La transición condicional garantiza que el stock y los agregados se ajusten una sola vez
+        # aunque haya cambios de estado concurrentes
+        old_status = order.status
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == old_status)
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            if new_status == OrderStatus.CANCELED:
+                released_product_ids = await release_stock(order_id, db)
+            await record_status_change(order, old_status, new_status, db)
+        elif await db.scalar(select(Order.status).where(Order.id == order_id)) != new_status:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order status changed concurrently; retry")
+
+    for key, value in updates.items():
         setattr(order, key, value)
 
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    await db.refresh(order)
+    if released_product_ids:
+        await invalidate_products(released_product_ids, db)
     return OrderOut.model_validate(order)
 
-async def get_order_item_by_id(order_item_id: int, db: Session) -> OrderItemOut:
-    order_item = db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
+async def get_order_item_by_id(order_item_id: int, db: AsyncSession) -> OrderItemOut:
+    order_item = await db.scalar(select(OrderItem).where(OrderItem.id == order_item_id))
     if not order_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order item not found")
     return OrderItemOut.model_validate(order_item)
 
-async def get_order_items_by_order(order_id: int, db: Session) -> list[OrderItemOut]:
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+async def get_order_items_by_order(order_id: int, db: AsyncSession) -> list[OrderItemOut]:
+    rows = (await db.execute(select(OrderItem.__table__).where(OrderItem.order_id == order_id))).all()
+
+    # Toda orden tiene al menos un ítem: solo se comprueba la existencia si no se encontró ninguno
+    if not rows and not await db.scalar(select(Order.id).where(Order.id == order_id)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    return [OrderItemOut.model_validate(item) for item in order_items]
+
+    return validate_many(OrderItemOut, rows)
@@ -0,0 +1,146 @@
+import codecs
+import csv
+import json
+from io import StringIO
+from typing import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app.core.cache import cache, category_products_key
+from app.core.config import settings
+from app.db.database import replicas
+from app.models.models import Product, Category
+from app.schemas.product import ProductCreate, ProductOut, ProductBulkError, ProductBulkResult
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+EXPORT_COLUMNS = list(ProductOut.model_fields)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def _iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"Invalid JSON: {e.msg}"
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[dict | str]:
+    header = None
+    record = ""
+    async for line in lines:
+        # Un registro puede ocupar varias líneas si tiene saltos de línea entre comillas
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Las celdas vacías equivalen a campos opcionales ausentes
+        yield {key: value for key, value in zip(header, values) if value != ""}
+
+async def _insert_chunk(
+    chunk: list[tuple[int, ProductCreate]],
+    known_categories: set[int],
+    db: AsyncSession,
+    errors: list[ProductBulkError],
+) -> int:
+    referenced = {product.category_id for _, product in chunk if product.category_id}
+    missing = referenced - known_categories
+    if missing:
+        known_categories.update((await db.scalars(select(Category.id).where(Category.id.in_(missing)))).all())
+
+    rows = []
+    for row_number, product in chunk:
+        if product.category_id and product.category_id not in known_categories:
+            errors.append(ProductBulkError(row=row_number, errors=[f"Category with ID {product.category_id} not found"]))
+            continue
+        rows.append(product.model_dump())
+
+    if rows:
+        await db.execute(insert(Product), rows)
+        await db.commit()
+        # El índice de búsqueda las incorpora en su siguiente refresco, por updated_at (server_default)
+        await cache.delete(*{category_products_key(row["category_id"]) for row in rows})
+    return len(rows)
+
+async def bulk_create_products(body: AsyncIterator[bytes], file_format: str, db: AsyncSession) -> ProductBulkResult:
+    if file_format == CSV_FORMAT:
+        records = _iter_csv_records(_iter_lines(body))
+    elif file_format == NDJSON_FORMAT:
+        records = _iter_ndjson_records(_iter_lines(body))
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Use text/csv or application/x-ndjson")
+
+    inserted = 0
+    errors: list[ProductBulkError] = []
+    known_categories: set[int] = set()
+    chunk: list[tuple[int, ProductCreate]] = []
+    row_number = 0
+
+    async for record in records:
+        row_number += 1
+        if isinstance(record, str):
+            errors.append(ProductBulkError(row=row_number, errors=[record]))
+            continue
+        try:
+            chunk.append((row_number, ProductCreate.model_validate(record)))
+        except ValidationError as e:
+            errors.append(ProductBulkError(
+                row=row_number,
+                errors=[f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()],
+            ))
+            continue
+
+        if len(chunk) >= settings.BULK_CHUNK_SIZE:
+            inserted += await _insert_chunk(chunk, known_categories, db, errors)
+            chunk = []
+
+    if chunk:
+        inserted += await _insert_chunk(chunk, known_categories, db, errors)
+
+    return ProductBulkResult(received=row_number, inserted=inserted, errors=sorted(errors, key=lambda error: error.row))
+
+def _format_csv_row(values: list) -> str:
+    output = StringIO()
+    csv.writer(output, lineterminator="\n").writerow(values)
+    return output.getvalue()
+
+async def export_products(file_format: str) -> AsyncIterator[str]:
+    # La sesión se abre aquí porque la de get_db se cierra antes de que termine la respuesta
+    async with replicas.session() as db:
+        stmt = select(Product).order_by(Product.id).execution_options(yield_per=settings.BULK_CHUNK_SIZE)
+        products = await db.stream_scalars(stmt)
+
+        if file_format == CSV_FORMAT:
+            yield _format_csv_row(EXPORT_COLUMNS)
+        async for product in products:
+            product_out = ProductOut.model_validate(product)
+            if file_format == CSV_FORMAT:
+                yield _format_csv_row(list(product_out.model_dump(mode="json").values()))
+            else:
+                yield product_out.model_dump_json() + "\n"
+            # Las filas ya emitidas no se necesitan en el identity map
+            db.expunge(product)
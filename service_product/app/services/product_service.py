@@ -1,31 +1,122 @@
-from sqlalchemy.orm import Session
-from app.schemas.product import ProductOut, ProductCreate, ProductUpdate
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.cache import cache, product_key, category_products_key
+from app.core.fieldsets import select_fields, sparse_model
+from app.core.serialization import validate_many
+from app.db.pagination import paginate
+from app.db.streaming import stream_models
+from app.services.search_service import index_product
+from app.services.quote_service import snapshot_product
+from app.schemas.pagination import Page
+from app.schemas.product import ProductOut, ProductBatchOut, ProductCreate, ProductUpdate
 from fastapi import HTTPException
 from app.models.models import Product, ProductStatus, Category
 
-async def get_product_by_id(product_id: int, db: Session) -> ProductOut:
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def get_product_by_id(product_id: int, db: AsyncSession) -> ProductOut:
+    cached = await cache.get(product_key(product_id))
+    if cached is not None:
+        return cached
+
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return ProductOut.model_validate(product)
+    product_out = ProductOut.model_validate(product)
+    await cache.set(product_key(product_id), product_out)
+    return product_out
+
+async def get_products_by_ids(ids: list[int], db: AsyncSession) -> ProductBatchOut[ProductOut]:
+    """
+    Resolve many products at once: cache hits first, then a single `IN` query for the
+    rest (which are cached too). Items keep the order of `ids` (repeated ids appear
+    once) and ids that do not exist are reported in `missing` instead of failing.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} distinct ids per request")
+    found = {product.id: product for product in await cache.get_many([product_key(product_id) for product_id in ids]) if product is not None}
+
+    pending = [product_id for product_id in ids if product_id not in found]
+    if pending:
+        rows = (await db.execute(select(Product.__table__).where(Product.id.in_(pending)))).all()
+        loaded = validate_many(ProductOut, rows)
+        await cache.set_many({product_key(product.id): product for product in loaded})
+        found.update((product.id, product) for product in loaded)
+
+    return ProductBatchOut[ProductOut](
+        items=[found[product_id] for product_id in ids if product_id in found],
+        missing=[product_id for product_id in ids if product_id not in found],
+    )
 
-async def get_all_products(db: Session) -> list[ProductOut]:
-    products = db.query(Product).all()
-    return [ProductOut.model_validate(product) for product in products]
+async def get_all_products(
+    db: AsyncSession,
+    limit: int,
+    cursor: int | None = None,
+    status: ProductStatus | None = None,
+    category_id: int | None = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> Page[ProductOut]:
+    stmt = _filter_products(select_fields(Product, fields), status, category_id, min_price, max_price)
+    return await paginate(db, stmt, Product.id, sparse_model(ProductOut, fields), limit, cursor)
 
-async def get_all_products_by_status(status: ProductStatus, db: Session) -> list[ProductOut]:
-    products = db.query(Product).filter(Product.status == status).all()
-    if not products:
+def stream_all_products(
+    stream_format: str,
+    cursor: int | None = None,
+    status: ProductStatus | None = None,
+    category_id: int | None = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+    fields: tuple[str, ...] | None = None,
+):
+    stmt = _filter_products(select_fields(Product, fields), status, category_id, min_price, max_price)
+    if cursor is not None:
+        stmt = stmt.where(Product.id > cursor)
+    return stream_models(stmt.order_by(Product.id), sparse_model(ProductOut, fields), stream_format)
+
+def _filter_products(
+    stmt,
+    status: ProductStatus | None = None,
+    category_id: int | None = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+):
+    if status is not None:
+        stmt = stmt.where(Product.status == status)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    return stmt
+
+def last_updated(products) -> datetime | None:
+    """Latest `updated_at` among `products` (used as Last-Modified), or None if the field was not selected."""
+    return max((product.updated_at for product in products if getattr(product, "updated_at", None) is not None), default=None)
+
+async def get_all_products_by_status(status: ProductStatus, db: AsyncSession, fields: tuple[str, ...] | None = None) -> list[ProductOut]:
+    rows = (await db.execute(select_fields(Product, fields).where(Product.status == status))).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="No products found with the specified status")
-    return [ProductOut.model_validate(product) for product in products]
+    return validate_many(sparse_model(ProductOut, fields), rows)
 
-async def get_all_products_by_category(category_id: int, db: Session) -> list[ProductOut]:
-    products = db.query(Product).filter(Product.category_id == category_id).all()
-    return [ProductOut.model_validate(product) for product in products]
+async def get_all_products_by_category(category_id: int, db: AsyncSession) -> list[ProductOut]:
+    cached = await cache.get(category_products_key(category_id))
+    if cached is not None:
+        return cached
 
-async def create_product(product_data: ProductCreate, db: Session) -> ProductOut:
+    rows = (await db.execute(select(Product.__table__).where(Product.category_id == category_id))).all()
+    products_out = validate_many(ProductOut, rows)
+    await cache.set(category_products_key(category_id), products_out)
+    return products_out
+
+async def create_product(product_data: ProductCreate, db: AsyncSession) -> ProductOut:
     if product_data.category_id:
-        category = db.query(Category).filter(Category.id == product_data.category_id).first()
+        category = await db.scalar(select(Category).where(Category.id == product_data.category_id))
         if not category:
             raise HTTPException(
                 status_code=404,
@@ -34,38 +125,59 @@ async def create_product(product_data: ProductCreate, db: Session) -> ProductOut
 
     new_product = Product(**product_data.model_dump())
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await db.commit()
+    await db.refresh(new_product)
+    await cache.delete(category_products_key(new_product.category_id))
+    index_product(new_product)
+    snapshot_product(new_product)
     return ProductOut.model_validate(new_product)
 
-async def update_product(product_id: int, product_data: ProductUpdate, db: Session) -> ProductOut:
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def update_product(product_id: int, product_data: ProductUpdate, db: AsyncSession) -> ProductOut:
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     updates = product_data.model_dump(exclude_unset=True)
 
     if "category_id" in updates and updates["category_id"] is not None:
-        category = db.query(Category).filter(Category.id == updates["category_id"]).first()
+        category = await db.scalar(select(Category).where(Category.id == updates["category_id"]))
         if not category:
             raise HTTPException(
                 status_code=404,
                 detail=f"Category with ID {updates['category_id']} not found"
             )
 
+    # Si solo cambia el stock, el estado se ajusta a la disponibilidad
+    if updates.get("stock") is not None and "status" not in updates:
+        if updates["stock"] == 0 and product.status == ProductStatus.ACTIVE:
+            updates["status"] = ProductStatus.OUT_OF_STOCK
+        elif updates["stock"] > 0 and product.status == ProductStatus.OUT_OF_STOCK:
+            updates["status"] = ProductStatus.ACTIVE
+
+    previous_category_id = product.category_id
     for key, value in updates.items():
         setattr(product, key, value)
 
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await cache.delete(
+        product_key(product_id),
+        category_products_key(previous_category_id),
+        category_products_key(product.category_id),
+    )
+    index_product(product)
+    snapshot_product(product)
     return ProductOut.model_validate(product)
 
-async def deactivate_product(product_id: int, db: Session) -> ProductOut:
-    product = db.query(Product).filter(Product.id == product_id).first()
+async def deactivate_product(product_id: int, db: AsyncSession) -> ProductOut:
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     product.status = "inactive"
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    await cache.delete(product_key(product_id), category_products_key(product.category_id))
+    index_product(product)
+    snapshot_product(product)
     return ProductOut.model_validate(product)
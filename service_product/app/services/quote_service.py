@@ -0,0 +1,90 @@
+import asyncio
+import time
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.price_snapshot import price_snapshot
+from app.core.pricing import order_total, price_line
+from app.models.models import Product
+from app.schemas.order import OrderCreateWithItems, OrderQuoteItemOut, OrderQuoteOut
+from app.services.order_service import cart_quantities
+
+_refresh_lock = asyncio.Lock()
+
+
+def snapshot_product(product: Product) -> None:
+    # Hasta la primera cotización no hay instantánea que mantener
+    if price_snapshot.loaded:
+        price_snapshot.upsert(product.id, product.price, product.iva, product.status)
+
+def _snapshot_columns():
+    return select(Product.id, Product.price, Product.iva, Product.status, Product.updated_at)
+
+async def _refresh_snapshot(db: AsyncSession) -> None:
+    if price_snapshot.loaded and time.monotonic() - price_snapshot.refreshed_at < settings.PRICE_SNAPSHOT_REFRESH_SECONDS:
+        return
+    # Con la instantánea ya cargada, si otra petición la está refrescando se cotiza con la actual
+    if price_snapshot.loaded and _refresh_lock.locked():
+        return
+    async with _refresh_lock:
+        if price_snapshot.loaded and time.monotonic() - price_snapshot.refreshed_at < settings.PRICE_SNAPSHOT_REFRESH_SECONDS:
+            return
+        stmt = _snapshot_columns()
+        if price_snapshot.loaded and price_snapshot.watermark is not None:
+            stmt = stmt.where(Product.updated_at >= price_snapshot.watermark - timedelta(seconds=settings.PRICE_SNAPSHOT_OVERLAP_SECONDS))
+        result = await db.stream(stmt.execution_options(yield_per=settings.BULK_CHUNK_SIZE))
+        async for rows in result.partitions():
+            price_snapshot.load_rows(rows)
+        price_snapshot.loaded, price_snapshot.refreshed_at = True, time.monotonic()
+
+async def quote_order(order_data: OrderCreateWithItems, db: AsyncSession) -> OrderQuoteOut:
+    """
+    Price a cart like `create_order` (same grouping, arithmetic and rounding) without
+    writing anything. Prices come from the in-process snapshot, at most
+    PRICE_SNAPSHOT_REFRESH_SECONDS old; the user and the stock are not checked.
+    """
+    quantities = cart_quantities(order_data)
+    await _refresh_snapshot(db)
+
+    prices = {product_id: price_snapshot.get(product_id) for product_id in quantities}
+    unknown = [product_id for product_id, price in prices.items() if price is None]
+    if unknown:
+        # Productos creados en otro worker después del último refresco
+        for row in (await db.execute(_snapshot_columns().where(Product.id.in_(unknown)))).all():
+            price_snapshot.upsert(row.id, row.price, row.iva, row.status)
+            prices[row.id] = price_snapshot.get(row.id)
+
+    items = []
+    subtotal = Decimal('0.00')
+    iva_total = Decimal('0.00')
+    for product_id, quantity in quantities.items():
+        if prices[product_id] is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID {product_id} not found or not active."
+            )
+        price, iva, product_status = prices[product_id]
+        item_subtotal, item_iva_amount = price_line(quantity, price, iva)
+        items.append(OrderQuoteItemOut(
+            product_id=product_id,
+            quantity=quantity,
+            price_at_time_of_order=price,
+            iva_at_time_of_order=iva,
+            subtotal=item_subtotal,
+            iva_amount=item_iva_amount,
+            line_total=item_subtotal + item_iva_amount,
+            product_status=product_status,
+        ))
+        subtotal += item_subtotal
+        iva_total += item_iva_amount
+
+    return OrderQuoteOut(
+        user_id=order_data.user_id,
+        subtotal=subtotal,
+        iva_total=iva_total,
+        total_amount=order_total(subtotal, iva_total),
+        items=items,
+    )
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.fieldsets import select_fields, sparse_model
+from app.core.serialization import validate_many
+from app.core.search import search_index, tokenize
+from app.models.models import Product, ProductStatus
+from app.schemas.pagination import Page
+from app.schemas.product import ProductOut
+
+_index_load_lock = asyncio.Lock()
+
+
+def index_product(product: Product) -> None:
+    search_index.upsert(product.id, product.name, product.description, product.status)
+
+def _index_columns():
+    return select(Product.id, Product.name, Product.description, Product.status, Product.updated_at)
+
+async def _ensure_index_loaded(db: AsyncSession) -> None:
+    """
+    Load the index on first use, then refresh it at most every SEARCH_INDEX_REFRESH_SECONDS
+    with the products changed since (by this or any other worker).
+    """
+    if search_index.loaded and time.monotonic() - search_index.refreshed_at < settings.SEARCH_INDEX_REFRESH_SECONDS:
+        return
+    # Con el índice ya cargado, si otra petición lo está refrescando se busca con el actual
+    if search_index.loaded and _index_load_lock.locked():
+        return
+    async with _index_load_lock:
+        if search_index.loaded:
+            if time.monotonic() - search_index.refreshed_at < settings.SEARCH_INDEX_REFRESH_SECONDS:
+                return
+            # Primero solo (id, updated_at), que sale del índice ix_products_updated_at; las filas completas
+            # solo de los productos que cambiaron desde el refresco anterior
+            stmt = select(Product.id, Product.updated_at)
+            if search_index.watermark is not None:
+                stmt = stmt.where(Product.updated_at >= search_index.watermark - timedelta(seconds=settings.SEARCH_INDEX_OVERLAP_SECONDS))
+            versions = dict((await db.execute(stmt)).all())
+            changed = [product_id for product_id, updated_at in versions.items() if search_index.recent.get(product_id) != updated_at]
+            for start in range(0, len(changed), settings.BULK_CHUNK_SIZE):
+                chunk = changed[start:start + settings.BULK_CHUNK_SIZE]
+                search_index.load_rows((await db.execute(_index_columns().where(Product.id.in_(chunk)))).all())
+            search_index.recent = versions
+            search_index.refreshed_at = time.monotonic()
+            return
+
+        search_index.begin_load()
+        try:
+            result = await db.stream(_index_columns().execution_options(yield_per=settings.BULK_CHUNK_SIZE))
+            async for rows in result.partitions():
+                search_index.load_rows(rows)
+        except BaseException:
+            search_index.abort_load()
+            raise
+        search_index.finish_load()
+        search_index.refreshed_at = time.monotonic()
+
+async def _search_fulltext(db: AsyncSession, terms: list[str], limit: int, offset: int, status: ProductStatus | None, fields: tuple[str, ...] | None) -> list:
+    # Modo booleano: todas las palabras son obligatorias (+) y se comparan como prefijo (*)
+    relevance = match(Product.name, Product.description, against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+    stmt = select_fields(Product, fields).where(relevance)
+    if status is not None:
+        stmt = stmt.where(Product.status == status)
+    stmt = stmt.order_by(relevance.desc(), Product.id).offset(offset).limit(limit + 1)
+    return list((await db.execute(stmt)).all())
+
+async def _search_index(db: AsyncSession, terms: list[str], limit: int, offset: int, status: ProductStatus | None, fields: tuple[str, ...] | None) -> list:
+    await _ensure_index_loaded(db)
+    ranked_ids = search_index.search(terms, offset + limit + 1, status)[offset:]
+    rows = {row.id: row for row in (await db.execute(select_fields(Product, fields).where(Product.id.in_(ranked_ids)))).all()}
+    return [rows[product_id] for product_id in ranked_ids if product_id in rows]
+
+async def search_products(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    offset: int = 0,
+    status: ProductStatus | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> Page[ProductOut]:
+    terms = tokenize(query)
+    if not terms:
+        return Page(items=[])
+
+    if db.bind.dialect.name == "mysql":
+        products = await _search_fulltext(db, terms, limit, offset, status, fields)
+    else:
+        products = await _search_index(db, terms, limit, offset, status, fields)
+
+    next_cursor = offset + limit if len(products) > limit else None
+    return Page(items=validate_many(sparse_model(ProductOut, fields), products[:limit]), next_cursor=next_cursor)
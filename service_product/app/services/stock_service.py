@@ -0,0 +1,77 @@
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from app.core.cache import cache, product_key, category_products_key
+from app.models.models import Product, ProductStatus, OrderItem
+
+# Un stock NULL indica que el producto no lleva control de inventario
+
+
+async def reserve_stock(quantities: dict[int, int], db: AsyncSession, undo_on_failure: bool = False) -> None:
+    """
+    Atomically decrement the stock of every product in `quantities` (product_id -> quantity).
+
+    Each line is a conditional UPDATE (`stock >= quantity`), so concurrent orders can never
+    oversell; rows are locked in product_id order to avoid deadlocks. Raises 409 if any line
+    cannot be reserved; the caller must roll back the transaction, unless `undo_on_failure`
+    is set, in which case the lines already reserved by this call are given back first so
+    the rest of the transaction can still be committed.
+    """
+    reserved: list[int] = []
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == product_id, or_(Product.stock.is_(None), Product.stock >= quantity))
+            .values(stock=Product.stock - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            if undo_on_failure:
+                await _give_back({reserved_id: quantities[reserved_id] for reserved_id in reserved}, db)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock for product ID {product_id}."
+            )
+        reserved.append(product_id)
+
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities), Product.stock == 0, Product.status == ProductStatus.ACTIVE)
+        .values(status=ProductStatus.OUT_OF_STOCK)
+        .execution_options(synchronize_session=False)
+    )
+
+async def _give_back(quantities: dict[int, int], db: AsyncSession) -> None:
+    for product_id in sorted(quantities):
+        await db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock.is_not(None))
+            .values(stock=Product.stock + quantities[product_id])
+            .execution_options(synchronize_session=False)
+        )
+
+async def release_stock(order_id: int, db: AsyncSession) -> list[int]:
+    """Give back the stock reserved by an order's items. Returns the affected product ids."""
+    items = (await db.execute(
+        select(OrderItem.product_id, OrderItem.quantity).where(OrderItem.order_id == order_id)
+    )).all()
+
+    await _give_back(dict(items), db)
+
+    product_ids = [product_id for product_id, _ in items]
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids), Product.stock > 0, Product.status == ProductStatus.OUT_OF_STOCK)
+        .values(status=ProductStatus.ACTIVE)
+        .execution_options(synchronize_session=False)
+    )
+    return product_ids
+
+async def invalidate_products(product_ids: list[int], db: AsyncSession) -> None:
+    """Drop the cached entries of products whose stock or status changed."""
+    rows = (await db.execute(select(Product.id, Product.category_id).where(Product.id.in_(product_ids)))).all()
+    await cache.delete(
+        *[product_key(product_id) for product_id, _ in rows],
+        *{category_products_key(category_id) for _, category_id in rows},
+    )
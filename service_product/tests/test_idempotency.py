@@ -0,0 +1,82 @@
+"""
+POST /orders/ with an Idempotency-Key: concurrent duplicates must create a single order
+and reserve its stock once. Run like test_query_plans.py:
+
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+import uuid
+from typing import Awaitable
+
+# Antes de importar la app: Settings exige DB_* y las pruebas usan siempre un SQLite propio
+_DB_DIR = tempfile.mkdtemp(prefix="idempotency-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'orders.db')}"
+for _name, _value in {"DB_USER": "test", "DB_PASSWORD": "test", "DB_HOST": "localhost", "DB_NAME": "test", "DB_PORT": "3306", "FRONTEND_URL": "http://localhost:3000"}.items():
+    os.environ.setdefault(_name, _value)
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from common_db.base import Base
+from common_db.models import User
+from app.core.cache import cache
+from app.db.database import SessionLocal, engine
+from app.main import app
+from app.models.models import Order, Product, ProductStatus
+from app.services.idempotency_service import REPLAYED_HEADER
+
+CONCURRENT_CLIENTS = 20
+STOCK = 10
+
+
+class IdempotentOrderTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User).values(id=1, name="test", email="test@example.com", hashed_password="x"))
+            await conn.execute(insert(Product).values(id=1, name="test", price=10, iva=0.21, stock=STOCK, status=ProductStatus.ACTIVE))
+        # Las pruebas recrean las tablas: nada de lo cacheado por otra prueba sigue siendo válido
+        await cache.delete_prefix("")
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.key = str(uuid.uuid4())
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await engine.dispose()
+
+    def _post(self, quantity: int) -> Awaitable[httpx.Response]:
+        return self.client.post(
+            "/orders/",
+            json={"user_id": 1, "items": [{"product_id": 1, "quantity": quantity}]},
+            headers={"Idempotency-Key": self.key},
+        )
+
+    async def test_concurrent_duplicates_create_one_order(self):
+        responses = await asyncio.gather(*(self._post(2) for _ in range(CONCURRENT_CLIENTS)))
+
+        self.assertEqual([response.status_code for response in responses], [201] * CONCURRENT_CLIENTS)
+        replayed = [response for response in responses if response.headers.get(REPLAYED_HEADER) == "true"]
+        self.assertEqual(len(replayed), CONCURRENT_CLIENTS - 1)
+        self.assertEqual({response.json()["id"] for response in responses}, {responses[0].json()["id"]})
+
+        async with SessionLocal() as db:
+            self.assertEqual(await db.scalar(select(func.count()).select_from(Order)), 1)
+            self.assertEqual(await db.scalar(select(Product.stock).where(Product.id == 1)), STOCK - 2)
+
+    async def test_same_key_with_another_body_is_rejected(self):
+        self.assertEqual((await self._post(2)).status_code, 201)
+
+        response = await self._post(3)
+
+        self.assertEqual(response.status_code, 422)
+        async with SessionLocal() as db:
+            self.assertEqual(await db.scalar(select(func.count()).select_from(Order)), 1)
+            self.assertEqual(await db.scalar(select(Product.stock).where(Product.id == 1)), STOCK - 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Query-plan regression tests: the hot queries of the services must keep using the
+indexes declared in app/models/models.py (and created by the Alembic migrations).
+
+Each case runs the real service function on a scratch SQLite database, captures the
+SQL it executes and checks its EXPLAIN QUERY PLAN. Run from `service_product` with the
+PYTHONPATH of the README (section 5):
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+# Antes de importar la app: Settings exige DB_* y las pruebas usan siempre un SQLite propio
+_DB_DIR = tempfile.mkdtemp(prefix="query-plans-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'plans.db')}"
+for _name, _value in {"DB_USER": "test", "DB_PASSWORD": "test", "DB_HOST": "localhost", "DB_NAME": "test", "DB_PORT": "3306", "FRONTEND_URL": "http://localhost:3000"}.items():
+    os.environ.setdefault(_name, _value)
+
+from sqlalchemy import event
+
+from common_db.base import Base
+from app.core.price_snapshot import price_snapshot
+from app.db.database import SessionLocal, engine
+from app.models.models import OrderStatus, ProductStatus
+from app.services import order_service, product_service, quote_service
+
+
+class QueryPlanTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await engine.dispose()
+
+    async def _plans(self, call) -> list[tuple[str, str]]:
+        """Run `call(db)` and return (sql, query plan) for every SELECT it executed."""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            async with SessionLocal() as db:
+                await call(db)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        plans = []
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters))).all()
+                plans.append((statement, "\n".join(row[-1] for row in rows)))
+        self.assertTrue(plans, "the call executed no SELECT")
+        return plans
+
+    async def assertUsesIndex(self, call, index: str, table: str):
+        """The first SELECT on `table` uses `index` and needs no separate sort."""
+        plans = [(sql, plan) for sql, plan in await self._plans(call) if f"FROM {table}" in sql]
+        self.assertTrue(plans, f"no SELECT on {table}")
+        sql, plan = plans[0]
+        self.assertIn(f"INDEX {index}", plan, f"{sql}\n{plan}")
+        self.assertNotIn("TEMP B-TREE", plan, f"{sql}\n{plan}")
+
+    async def test_products_by_status(self):
+        await self.assertUsesIndex(
+            lambda db: product_service.get_all_products(db, 50, status=ProductStatus.ACTIVE),
+            "ix_products_status_id", "products",
+        )
+
+    async def test_products_by_status_next_page(self):
+        await self.assertUsesIndex(
+            lambda db: product_service.get_all_products(db, 50, cursor=1000, status=ProductStatus.ACTIVE),
+            "ix_products_status_id", "products",
+        )
+
+    async def test_products_by_category(self):
+        await self.assertUsesIndex(
+            lambda db: product_service.get_all_products(db, 50, category_id=1),
+            "ix_products_category_id_id", "products",
+        )
+
+    async def test_products_by_category_and_status(self):
+        await self.assertUsesIndex(
+            lambda db: product_service.get_all_products(db, 50, status=ProductStatus.ACTIVE, category_id=1),
+            "ix_products_category_id_status_id", "products",
+        )
+
+    async def test_orders_by_status(self):
+        await self.assertUsesIndex(
+            lambda db: order_service.get_all_orders(db, 50, status=OrderStatus.PENDING),
+            "ix_orders_status_id", "orders",
+        )
+
+    async def test_orders_by_user(self):
+        await self.assertUsesIndex(
+            lambda db: order_service.get_orders_by_user(1, db, 50),
+            "ix_orders_user_id_id", "orders",
+        )
+
+    async def test_orders_by_user_next_page(self):
+        await self.assertUsesIndex(
+            lambda db: order_service.get_orders_by_user(1, db, 50, cursor=1000),
+            "ix_orders_user_id_id", "orders",
+        )
+
+    async def test_price_snapshot_refresh(self):
+        # Refresco incremental: solo las filas con updated_at posterior a la marca de agua
+        price_snapshot.loaded, price_snapshot.watermark, price_snapshot.refreshed_at = True, datetime(2026, 1, 1), 0.0
+        try:
+            await self.assertUsesIndex(quote_service._refresh_snapshot, "ix_products_updated_at", "products")
+        finally:
+            price_snapshot.loaded, price_snapshot.watermark = False, None
+
+
+if __name__ == "__main__":
+    unittest.main()